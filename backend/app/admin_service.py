@@ -4,14 +4,22 @@ Comprehensive service for managing system capabilities, roles, and security
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from typing import Dict, List, Mapping, Optional, Any
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import and_, or_, desc, func, insert
 from . import models
 from .notification_service import NotificationService
+import copy
 import json
 import logging
+import time
 from enum import Enum
+from types import MappingProxyType
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +42,125 @@ class RiskLevel(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+_HIGH_RISK_ACTIONS = (
+    AuditAction.CAPABILITY_CHANGE,
+    AuditAction.ROLE_CHANGE,
+    AuditAction.USER_DELETE,
+    AuditAction.SYSTEM_SETTING_CHANGE
+)
+
+_MEDIUM_RISK_ACTIONS = (
+    AuditAction.USER_CREATE,
+    AuditAction.USER_DEACTIVATE,
+    AuditAction.PERMISSION_GRANT,
+    AuditAction.PERMISSION_REVOKE
+)
+
+# action value -> risk level value; anything not listed is low risk
+_RISK_BY_ACTION = {
+    **{action.value: RiskLevel.MEDIUM.value for action in _MEDIUM_RISK_ACTIONS},
+    **{action.value: RiskLevel.HIGH.value for action in _HIGH_RISK_ACTIONS}
+}
+
+_MODULES = (
+    'dashboard', 'recruitment', 'onboarding', 'employees', 'attendance',
+    'leave', 'performance', 'engagement', 'learning', 'payroll',
+    'analysis', 'career', 'assets', 'announcements'
+)
+
+_MANAGER_MODULES = frozenset({
+    'dashboard', 'recruitment', 'employees', 'attendance', 'leave',
+    'performance', 'engagement', 'analysis', 'assets', 'announcements'
+})
+_ASSETS_TEAM_MODULES = frozenset({'dashboard', 'assets', 'announcements'})
+_EMPLOYEE_MODULES = frozenset({
+    'dashboard', 'attendance', 'leave', 'performance', 'engagement',
+    'learning', 'career', 'assets', 'announcements'
+})
+_CANDIDATE_MODULES = frozenset({'dashboard'})
+
+def _build_default_caps() -> Dict[str, Any]:
+    """Build the default system capabilities"""
+    def restricted(enabled_modules: frozenset, permissions: List[str]) -> Dict[str, Any]:
+        return {
+            module: {
+                "enabled": module in enabled_modules,
+                "permissions": list(permissions) if module in enabled_modules else []
+            } for module in _MODULES
+        }
+    
+    return {
+        "super_admin": {module: {"enabled": True, "permissions": ["read", "write", "delete"]} for module in _MODULES},
+        "admin": {module: {"enabled": True, "permissions": ["read", "write", "delete"]} for module in _MODULES},
+        "hr": {module: {"enabled": True, "permissions": ["read", "write"]} for module in _MODULES},
+        "manager": restricted(_MANAGER_MODULES, ["read", "write"]),
+        "assets_team": restricted(_ASSETS_TEAM_MODULES, ["read", "write"]),
+        "employee": restricted(_EMPLOYEE_MODULES, ["read"]),
+        "candidate": restricted(_CANDIDATE_MODULES, ["read"])
+    }
+
+# Built once at import time; AdminService hands out deep copies
+_DEFAULT_CAPS_TEMPLATE = _build_default_caps()
+
+def _dump_json(value: Any) -> str:
+    """Compact JSON for audit log payloads (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(",", ":"))
+
+def _build_perm_index(capabilities: Dict[str, Any]) -> frozenset:
+    """Flatten capabilities into the set of allowed (role, module, action) triples"""
+    return frozenset(
+        (role, module, action)
+        for role, role_caps in capabilities.items()
+        for module, module_caps in role_caps.items()
+        if module_caps.get("enabled", False)
+        for action in module_caps.get("permissions", [])
+    )
+
+_DEFAULT_SETTINGS_SOURCE = {
+    "session": {
+        "timeout_minutes": 30,
+        "max_concurrent_sessions": 3,
+        "require_2fa_for_admins": True
+    },
+    "security": {
+        "log_all_data_access": True,
+        "ip_whitelisting_enabled": False,
+        "password_expiry_days": 90,
+        "min_password_length": 8,
+        "require_special_chars": True
+    },
+    "data_retention": {
+        "audit_logs_days": 365,
+        "application_data_days": 730,
+        "user_activity_days": 90
+    },
+    "notifications": {
+        "notify_capability_changes": True,
+        "notify_role_changes": True,
+        "daily_security_digest": False,
+        "admin_email": "admin@company.com"
+    }
+}
+
+# Read-only view handed to callers, so the shared defaults can't be mutated
+_DEFAULT_SETTINGS = MappingProxyType({
+    section: MappingProxyType(values) for section, values in _DEFAULT_SETTINGS_SOURCE.items()
+})
+
+# Reused for every audit write so the compiled statement is cached
+_AUDIT_INSERT = insert(models.AuditLog.__table__)
+
+# Upper bound for audit log look-back, matching the audit_logs retention setting
+_MAX_AUDIT_DAYS_BACK = _DEFAULT_SETTINGS_SOURCE["data_retention"]["audit_logs_days"]
+
 class AdminService:
+    # Per-process capabilities cache shared by all instances:
+    # {"loaded_at", "capabilities", "json" (lazy), "perm_index"}
+    _caps_cache: Optional[Dict[str, Any]] = None
+    _CAPS_TTL = 30  # seconds
+    
     def __init__(self, db: Session):
         self.db = db
         self.notification_service = NotificationService(db)
@@ -42,21 +168,68 @@ class AdminService:
     # ==================== CAPABILITY MANAGEMENT ====================
     
     def get_system_capabilities(self) -> Dict[str, Any]:
-        """Get all system capabilities with role-based permissions"""
+        """Get all system capabilities with role-based permissions
+        
+        Returns a deep copy, so callers may edit it without touching the shared cache.
+        """
+        return copy.deepcopy(self._get_cached_capabilities())
+    
+    def _get_cached_capabilities(self) -> Dict[str, Any]:
+        """Get the shared capabilities dict (cached for _CAPS_TTL seconds); must not be mutated"""
+        cached = AdminService._caps_cache
+        if cached and time.monotonic() - cached["loaded_at"] < self._CAPS_TTL:
+            return cached["capabilities"]
+        
         try:
             # Try to get from database first
             capabilities = self._get_capabilities_from_db()
-            if capabilities:
-                return capabilities
-            
-            # Fallback to default capabilities
-            return self._get_default_capabilities()
+            if not capabilities:
+                # Fallback to default capabilities
+                capabilities = self._get_default_capabilities()
         except Exception as e:
             logger.error(f"Error fetching capabilities: {e}")
             return self._get_default_capabilities()
-    
-    def save_system_capabilities(self, capabilities: Dict[str, Any], updated_by: int) -> Dict[str, Any]:
-        """Save system capabilities with audit logging"""
+        
+        AdminService._caps_cache = {
+            "loaded_at": time.monotonic(),
+            "capabilities": capabilities,
+            "json": None,
+            "perm_index": _build_perm_index(capabilities)
+        }
+        return capabilities
+    
+    @classmethod
+    def invalidate_capabilities_cache(cls):
+        """Drop the cached capabilities so the next read reloads them"""
+        cls._caps_cache = None
+    
+    def _get_capabilities_snapshot(self) -> tuple:
+        """Get current capabilities with their JSON form, serializing at most once per cache fill"""
+        capabilities = self._get_cached_capabilities()
+        cached = AdminService._caps_cache
+        if not cached or cached["capabilities"] is not capabilities:
+            return capabilities, _dump_json(capabilities)
+        
+        if cached["json"] is None:
+            cached["json"] = _dump_json(capabilities)
+        return capabilities, cached["json"]
+    
+    def _get_perm_index(self) -> frozenset:
+        """Get the (role, module, action) index for the current capabilities"""
+        capabilities = self._get_cached_capabilities()
+        cached = AdminService._caps_cache
+        if cached and cached["capabilities"] is capabilities:
+            return cached["perm_index"]
+        return _build_perm_index(capabilities)
+    
+    def save_system_capabilities(self, capabilities: Dict[str, Any], updated_by: int, *,
+                                 expected_capabilities: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Save system capabilities with audit logging
+        
+        expected_capabilities is the snapshot the caller edited from; when given,
+        the save is rejected as a conflict if the stored capabilities have since
+        changed. The audit "old" value always comes from the server.
+        """
         try:
             # Validate capabilities structure
             validation_result = self._validate_capabilities(capabilities)
@@ -64,10 +237,27 @@ class AdminService:
                 return {"success": False, "message": validation_result["message"]}
             
             # Get old capabilities for audit
-            old_capabilities = self.get_system_capabilities()
+            old_capabilities, old_capabilities_json = self._get_capabilities_snapshot()
+            
+            if expected_capabilities is not None and expected_capabilities != old_capabilities:
+                return {
+                    "success": False,
+                    "conflict": True,
+                    "message": "Capabilities were changed by someone else; reload and try again"
+                }
+            
+            # Nothing to save or audit when the capabilities are unchanged
+            if capabilities == old_capabilities:
+                return {
+                    "success": True,
+                    "message": "No changes",
+                    "updated_roles": [],
+                    "total_roles": len(capabilities)
+                }
             
             # Save to database
             self._save_capabilities_to_db(capabilities, updated_by)
+            self.invalidate_capabilities_cache()
             
             # Create audit log
             self._create_audit_log(
@@ -75,8 +265,8 @@ class AdminService:
                 action=AuditAction.CAPABILITY_CHANGE.value,
                 resource_type="system_capabilities",
                 resource_id=0,
-                old_value=json.dumps(old_capabilities),
-                new_value=json.dumps(capabilities),
+                old_value=old_capabilities_json,
+                new_value=_dump_json(capabilities),
                 details=f"System capabilities updated for {len(capabilities)} roles"
             )
             
@@ -96,40 +286,40 @@ class AdminService:
     
     def get_role_capabilities(self, role: str) -> Dict[str, Any]:
         """Get capabilities for a specific role"""
-        all_capabilities = self.get_system_capabilities()
-        return all_capabilities.get(role, {})
+        all_capabilities = self._get_cached_capabilities()
+        return copy.deepcopy(all_capabilities.get(role, {}))
     
     def validate_user_permission(self, user_role: str, module: str, action: str) -> bool:
         """Validate if user has permission for specific action"""
-        capabilities = self.get_role_capabilities(user_role)
-        module_caps = capabilities.get(module, {})
-        
-        if not module_caps.get("enabled", False):
-            return False
-        
-        permissions = module_caps.get("permissions", [])
-        return action in permissions
+        return (user_role, module, action) in self._get_perm_index()
     
     # ==================== USER MANAGEMENT ====================
     
     def get_user_statistics(self) -> Dict[str, Any]:
         """Get comprehensive user statistics"""
         try:
-            users = self.db.query(models.User).all()
+            rows = self.db.query(
+                models.User.role, models.User.is_active, func.count(models.User.id)
+            ).group_by(models.User.role, models.User.is_active).all()
             
             stats = {
-                "total_users": len(users),
-                "active_users": len([u for u in users if u.is_active]),
-                "inactive_users": len([u for u in users if not u.is_active]),
+                "total_users": 0,
+                "active_users": 0,
+                "inactive_users": 0,
                 "by_role": {},
                 "recent_logins": self._get_recent_login_stats(),
                 "security_stats": self._get_security_stats()
             }
             
-            # Count by role
-            for user in users:
-                role = user.role or 'employee'
-                stats["by_role"][role] = stats["by_role"].get(role, 0) + 1
+            # Fold (role, is_active) counts into totals and per-role tallies
+            for role, is_active, count in rows:
+                stats["total_users"] += count
+                if is_active:
+                    stats["active_users"] += count
+                else:
+                    stats["inactive_users"] += count
+                role = role or 'employee'
+                stats["by_role"][role] = stats["by_role"].get(role, 0) + count
             
             return stats
         except Exception as e:
@@ -185,24 +375,18 @@ class AdminService:
     def get_users_list(self, skip: int = 0, limit: int = 100, role_filter: Optional[str] = None) -> Dict[str, Any]:
         """Get paginated list of users with optional role filtering"""
         try:
-            query = self.db.query(models.User)
+            # Shared by the page and count queries so they can't drift
+            filters = [models.User.role == role_filter] if role_filter else []
             
-            if role_filter:
-                query = query.filter(models.User.role == role_filter)
+            users = self.db.query(models.User).filter(*filters).offset(skip).limit(limit).all()
+            # A short first page already is the whole result set; only count otherwise
+            if skip == 0 and len(users) < limit:
+                total = len(users)
+            else:
+                total = self.db.query(func.count(models.User.id)).filter(*filters).scalar()
+            last_logins = self._get_users_last_login([user.id for user in users])
             
-            total = query.count()
-            users = query.offset(skip).limit(limit).all()
-            
-            users_data = []
-            for user in users:
-                users_data.append({
-                    "id": user.id,
-                    "email": user.email,
-                    "role": user.role,
-                    "is_active": user.is_active,
-                    "created_at": user.created_at.isoformat() if user.created_at else None,
-                    "last_login": self._get_user_last_login(user.id)
-                })
+            users_data = [self._format_user(user, last_logins.get(user.id)) for user in users]
             
             return {
                 "users": users_data,
@@ -221,39 +405,39 @@ class AdminService:
                       user_filter: Optional[int] = None, days_back: int = 30) -> Dict[str, Any]:
         """Get audit logs with filtering and pagination"""
         try:
-            query = self.db.query(models.AuditLog).join(models.User)
+            # Keep the created_at range scan bounded by the retention window
+            days_back = min(days_back, _MAX_AUDIT_DAYS_BACK)
+            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
             
-            # Apply filters
+            # The indexed created_at range predicate goes first (ix_audit_logs_created_action_user)
+            filters = [models.AuditLog.created_at >= cutoff_date]
             if action_filter:
-                query = query.filter(models.AuditLog.action == action_filter)
-            
+                filters.append(models.AuditLog.action == action_filter)
             if user_filter:
-                query = query.filter(models.AuditLog.user_id == user_filter)
-            
-            # Date filter
-            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
-            query = query.filter(models.AuditLog.created_at >= cutoff_date)
-            
-            total = query.count()
-            logs = query.order_by(desc(models.AuditLog.created_at)).offset(skip).limit(limit).all()
-            
-            logs_data = []
-            for log in logs:
-                logs_data.append({
-                    "id": log.id,
-                    "user_id": log.user_id,
-                    "user_email": log.user.email if log.user else "Unknown",
-                    "action": log.action,
-                    "resource_type": log.resource_type,
-                    "resource_id": log.resource_id,
-                    "old_value": log.old_value,
-                    "new_value": log.new_value,
-                    "ip_address": log.ip_address,
-                    "user_agent": log.user_agent,
-                    "created_at": log.created_at.isoformat(),
-                    "risk_level": self._assess_action_risk(log.action),
-                    "details": getattr(log, 'details', '')
-                })
+                filters.append(models.AuditLog.user_id == user_filter)
+            
+            # Hydrate log.user from the same JOIN instead of lazy-loading it per row;
+            # COUNT(*) OVER () returns the filtered total with the page, saving a second scan
+            rows = self.db.query(
+                models.AuditLog, func.count().over().label("total")
+            ).join(models.AuditLog.user).options(
+                contains_eager(models.AuditLog.user)
+            ).filter(*filters).order_by(
+                desc(models.AuditLog.created_at)
+            ).offset(skip).limit(limit).all()
+            
+            logs = [log for log, _ in rows]
+            if rows:
+                total = rows[0].total
+            elif skip:
+                # Page past the end: the window total is unavailable, so count explicitly
+                total = self.db.query(func.count(models.AuditLog.id)).join(
+                    models.AuditLog.user
+                ).filter(*filters).scalar()
+            else:
+                total = 0
+            
+            logs_data = [self._format_audit_log(log) for log in logs]
             
             return {
                 "logs": logs_data,
@@ -273,46 +457,28 @@ class AdminService:
         return self._create_audit_log(user_id, action, resource_type, resource_id, 
                                     old_value, new_value, ip_address, user_agent, details)
     
+    def create_audit_logs_bulk(self, entries: List[Dict[str, Any]]) -> bool:
+        """Create multiple audit log entries in one round trip"""
+        return self._create_audit_logs_bulk(entries)
+    
     # ==================== SYSTEM SETTINGS ====================
     
-    def get_system_settings(self) -> Dict[str, Any]:
-        """Get system settings"""
-        try:
-            # In production, this would come from a settings table
-            # For now, return default settings
-            return {
-                "session": {
-                    "timeout_minutes": 30,
-                    "max_concurrent_sessions": 3,
-                    "require_2fa_for_admins": True
-                },
-                "security": {
-                    "log_all_data_access": True,
-                    "ip_whitelisting_enabled": False,
-                    "password_expiry_days": 90,
-                    "min_password_length": 8,
-                    "require_special_chars": True
-                },
-                "data_retention": {
-                    "audit_logs_days": 365,
-                    "application_data_days": 730,
-                    "user_activity_days": 90
-                },
-                "notifications": {
-                    "notify_capability_changes": True,
-                    "notify_role_changes": True,
-                    "daily_security_digest": False,
-                    "admin_email": "admin@company.com"
-                }
-            }
-        except Exception as e:
-            logger.error(f"Error fetching system settings: {e}")
-            return {}
+    def get_system_settings(self) -> Mapping[str, Any]:
+        """Get system settings (read-only view; use get_system_settings_mutable to edit)"""
+        # In production, this would come from a settings table
+        # For now, return default settings
+        return _DEFAULT_SETTINGS
+    
+    def get_system_settings_mutable(self) -> Dict[str, Any]:
+        """Get a mutable copy of the system settings"""
+        return copy.deepcopy(_DEFAULT_SETTINGS_SOURCE)
     
     def save_system_settings(self, settings: Dict[str, Any], updated_by: int) -> Dict[str, Any]:
         """Save system settings with audit logging"""
         try:
-            old_settings = self.get_system_settings()
+            old_settings = self.get_system_settings_mutable()
+            if settings == old_settings:
+                return {"success": True, "message": "No changes"}
             
             # In production, save to database
             # For now, just validate and log
@@ -323,8 +489,8 @@ class AdminService:
                 action=AuditAction.SYSTEM_SETTING_CHANGE.value,
                 resource_type="system_settings",
                 resource_id=0,
-                old_value=json.dumps(old_settings),
-                new_value=json.dumps(settings),
+                old_value=_dump_json(old_settings),
+                new_value=_dump_json(settings),
                 details="System settings updated"
             )
             
@@ -384,42 +550,8 @@ class AdminService:
         pass
     
     def _get_default_capabilities(self) -> Dict[str, Any]:
-        """Get default system capabilities"""
-        modules = [
-            'dashboard', 'recruitment', 'onboarding', 'employees', 'attendance',
-            'leave', 'performance', 'engagement', 'learning', 'payroll',
-            'analysis', 'career', 'assets', 'announcements'
-        ]
-        
-        return {
-            "super_admin": {module: {"enabled": True, "permissions": ["read", "write", "delete"]} for module in modules},
-            "admin": {module: {"enabled": True, "permissions": ["read", "write", "delete"]} for module in modules},
-            "hr": {module: {"enabled": True, "permissions": ["read", "write"]} for module in modules},
-            "manager": {
-                module: {
-                    "enabled": module in ['dashboard', 'recruitment', 'employees', 'attendance', 'leave', 'performance', 'engagement', 'analysis', 'assets', 'announcements'],
-                    "permissions": ["read", "write"] if module in ['dashboard', 'recruitment', 'employees', 'attendance', 'leave', 'performance', 'engagement', 'analysis', 'assets', 'announcements'] else []
-                } for module in modules
-            },
-            "assets_team": {
-                module: {
-                    "enabled": module in ['dashboard', 'assets', 'announcements'],
-                    "permissions": ["read", "write"] if module in ['dashboard', 'assets', 'announcements'] else []
-                } for module in modules
-            },
-            "employee": {
-                module: {
-                    "enabled": module in ['dashboard', 'attendance', 'leave', 'performance', 'engagement', 'learning', 'career', 'assets', 'announcements'],
-                    "permissions": ["read"] if module in ['dashboard', 'attendance', 'leave', 'performance', 'engagement', 'learning', 'career', 'assets', 'announcements'] else []
-                } for module in modules
-            },
-            "candidate": {
-                module: {
-                    "enabled": module == 'dashboard',
-                    "permissions": ["read"] if module == 'dashboard' else []
-                } for module in modules
-            }
-        }
+        """Get a mutable copy of the default system capabilities"""
+        return copy.deepcopy(_DEFAULT_CAPS_TEMPLATE)
     
     def _validate_capabilities(self, capabilities: Dict[str, Any]) -> Dict[str, Any]:
         """Validate capabilities structure"""
@@ -460,52 +592,70 @@ class AdminService:
                          resource_id: int, old_value: str = None, new_value: str = None,
                          ip_address: str = None, user_agent: str = None, details: str = None) -> bool:
         """Create audit log entry"""
+        return self._create_audit_logs_bulk([{
+            "user_id": user_id,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "old_value": old_value,
+            "new_value": new_value,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "details": details
+        }])
+    
+    def _create_audit_logs_bulk(self, entries: List[Dict[str, Any]]) -> bool:
+        """Create many audit log entries in a single executemany INSERT and commit"""
+        if not entries:
+            return True
+        
         try:
-            audit_log = models.AuditLog(
-                user_id=user_id,
-                action=action,
-                resource_type=resource_type,
-                resource_id=resource_id,
-                old_value=old_value,
-                new_value=new_value,
-                ip_address=ip_address,
-                user_agent=user_agent
-            )
+            # Drop details unless the model supports it
+            if not hasattr(models.AuditLog, 'details'):
+                entries = [{k: v for k, v in entry.items() if k != 'details'} for entry in entries]
             
-            # Add details if provided (assuming the model supports it)
-            if hasattr(audit_log, 'details') and details:
-                audit_log.details = details
-            
-            self.db.add(audit_log)
+            # Core executemany on a cached statement; no unit-of-work or identity map overhead
+            self.db.execute(_AUDIT_INSERT, entries)
             self.db.commit()
             return True
             
         except Exception as e:
-            logger.error(f"Error creating audit log: {e}")
+            logger.error(f"Error creating audit logs: {e}")
+            self.db.rollback()
             return False
     
+    def _format_user(self, user: models.User, last_login: Optional[str]) -> Dict[str, Any]:
+        """Format a user row for the admin users list"""
+        return {
+            "id": user.id,
+            "email": user.email,
+            "role": user.role,
+            "is_active": user.is_active,
+            "created_at": user.created_at.isoformat() if user.created_at else None,
+            "last_login": last_login
+        }
+    
+    def _format_audit_log(self, log: models.AuditLog) -> Dict[str, Any]:
+        """Format an audit log row for the admin audit log list"""
+        return {
+            "id": log.id,
+            "user_id": log.user_id,
+            "user_email": log.user.email if log.user else "Unknown",
+            "action": log.action,
+            "resource_type": log.resource_type,
+            "resource_id": log.resource_id,
+            "old_value": log.old_value,
+            "new_value": log.new_value,
+            "ip_address": log.ip_address,
+            "user_agent": log.user_agent,
+            "created_at": log.created_at.isoformat(),
+            "risk_level": self._assess_action_risk(log.action),
+            "details": getattr(log, 'details', '')
+        }
+    
     def _assess_action_risk(self, action: str) -> str:
         """Assess risk level of an action"""
-        high_risk_actions = [
-            AuditAction.CAPABILITY_CHANGE.value,
-            AuditAction.ROLE_CHANGE.value,
-            AuditAction.USER_DELETE.value,
-            AuditAction.SYSTEM_SETTING_CHANGE.value
-        ]
-        
-        medium_risk_actions = [
-            AuditAction.USER_CREATE.value,
-            AuditAction.USER_DEACTIVATE.value,
-            AuditAction.PERMISSION_GRANT.value,
-            AuditAction.PERMISSION_REVOKE.value
-        ]
-        
-        if action in high_risk_actions:
-            return RiskLevel.HIGH.value
-        elif action in medium_risk_actions:
-            return RiskLevel.MEDIUM.value
-        else:
-            return RiskLevel.LOW.value
+        return _RISK_BY_ACTION.get(action, RiskLevel.LOW.value)
     
     def _get_recent_login_stats(self) -> Dict[str, Any]:
         """Get recent login statistics"""
@@ -527,8 +677,21 @@ class AdminService:
     
     def _get_user_last_login(self, user_id: int) -> Optional[str]:
         """Get user's last login timestamp"""
-        # Placeholder - in production, implement login tracking
-        return None
+        return self._get_users_last_login([user_id]).get(user_id)
+    
+    def _get_users_last_login(self, user_ids: List[int]) -> Dict[int, Optional[str]]:
+        """Get last login timestamps for a batch of users in one query"""
+        if not user_ids:
+            return {}
+        
+        rows = self.db.query(
+            models.AuditLog.user_id, func.max(models.AuditLog.created_at)
+        ).filter(
+            models.AuditLog.action == AuditAction.LOGIN.value,
+            models.AuditLog.user_id.in_(user_ids)
+        ).group_by(models.AuditLog.user_id).all()
+        
+        return {user_id: last_login.isoformat() if last_login else None for user_id, last_login in rows}
     
     def _notify_capability_changes(self, new_caps: Dict[str, Any], old_caps: Dict[str, Any], updated_by: int):
         """Notify relevant users about capability changes"""
@@ -557,8 +720,8 @@ class AdminService:
     
     def _generate_security_capabilities(self) -> Dict[str, Any]:
         """Generate security-focused capabilities"""
-        # Minimal permissions with maximum security
-        capabilities = self._get_default_capabilities()
+        # Minimal permissions with maximum security; mutated below, so start from a deep copy
+        capabilities = copy.deepcopy(_DEFAULT_CAPS_TEMPLATE)
         
         # Reduce permissions for all roles except super_admin
         for role in capabilities:
@@ -1,8 +1,22 @@
 from textblob import TextBlob
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, ENGLISH_STOP_WORDS
 from sklearn.metrics.pairwise import cosine_similarity
+from collections import Counter
+from functools import lru_cache
+import math
+import re
 import numpy as np
 
+try:
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    # Module-level singleton so the lexicon is loaded once per process
+    _VADER = SentimentIntensityAnalyzer()
+except ImportError:
+    _VADER = None
+
+# Same token rule as sklearn's default token_pattern
+_TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+
 def analyze_sentiment(text: str):
     """
     Analyzes the sentiment of a given text.
@@ -11,8 +25,16 @@ def analyze_sentiment(text: str):
     if not text:
         return {"score": 0.0, "label": "Neutral"}
     
-    analysis = TextBlob(text)
-    score = analysis.sentiment.polarity
+    score, label = _sentiment_cached(text)
+    return {"score": score, "label": label}
+
+@lru_cache(maxsize=4096)
+def _sentiment_cached(text: str):
+    """Memoized (score, label) for a text; survey comments and feedback repeat often"""
+    if _VADER is not None:
+        score = _VADER.polarity_scores(text)["compound"]
+    else:
+        score = TextBlob(text).sentiment.polarity
     
     if score > 0.1:
         label = "Positive"
@@ -21,7 +43,22 @@ def analyze_sentiment(text: str):
     else:
         label = "Neutral"
         
-    return {"score": score, "label": label}
+    return score, label
+
+def preload_sentiment_corpus(texts):
+    """Warm the sentiment cache, e.g. from a background task after deploy"""
+    for text in texts:
+        if text:
+            _sentiment_cached(text)
+
+# Attrition features and the value assumed when one is missing
+_ATTRITION_DEFAULTS = {
+    "last_rating": 5,
+    "engagement_score": 10,
+    "tenure_years": 0,
+    "salary_hike_percent": 0,
+    "overtime_hours": 0,
+}
 
 def predict_attrition_risk(employee_data: dict):
     """
@@ -35,41 +72,81 @@ def predict_attrition_risk(employee_data: dict):
     - engagement_score (float, 0-10)
     - overtime_hours (float)
     """
-    risk_score = 0
+    columns = {key: [employee_data.get(key, default)] for key, default in _ATTRITION_DEFAULTS.items()}
+    return str(predict_attrition_risk_batch(columns)[0])
+
+def predict_attrition_risk_batch(employees):
+    """
+    Vectorized predict_attrition_risk over many employees.
     
-    # Factor 1: Performance vs Satisfaction (Low rating usually means unhappy or bad fit)
-    if employee_data.get("last_rating", 5) < 3.0:
-        risk_score += 3
-        
-    # Factor 2: Engagement
-    if employee_data.get("engagement_score", 10) < 5:
-        risk_score += 3
-        
-    # Factor 3: Tenure & Growth
-    # High tenure with low recent hike is a risk
-    if employee_data.get("tenure_years", 0) > 2 and employee_data.get("salary_hike_percent", 0) < 5:
-        risk_score += 2
-        
-    # Factor 4: Overwork
-    if employee_data.get("overtime_hours", 0) > 10: # hours per week avg
-        risk_score += 2
-        
-    # Classification
-    if risk_score >= 6:
-        return "High"
-    elif risk_score >= 3:
-        return "Medium"
-    else:
-        return "Low"
+    Accepts a pandas DataFrame or a dict of equal-length arrays keyed like
+    predict_attrition_risk's employee_data; missing columns use the same
+    defaults. Returns a NumPy array of "High" / "Medium" / "Low" labels.
+    """
+    keys = list(employees.keys())
+    length = len(employees[keys[0]]) if keys else 0
+    
+    def column(key):
+        if key in employees:
+            return np.asarray(employees[key], dtype=np.float64)
+        return np.full(length, _ATTRITION_DEFAULTS[key], dtype=np.float64)
+    
+    rating = column("last_rating")
+    engagement = column("engagement_score")
+    tenure = column("tenure_years")
+    hike = column("salary_hike_percent")
+    overtime = column("overtime_hours")
+    
+    # Factor 1: low rating (+3), Factor 2: low engagement (+3),
+    # Factor 3: long tenure with a low hike (+2), Factor 4: overwork (+2)
+    risk_score = (
+        3 * (rating < 3.0).astype(np.int8)
+        + 3 * (engagement < 5).astype(np.int8)
+        + 2 * ((tenure > 2) & (hike < 5)).astype(np.int8)
+        + 2 * (overtime > 10).astype(np.int8)
+    )
+    
+    return np.where(risk_score >= 6, "High", np.where(risk_score >= 3, "Medium", "Low"))
+
+@lru_cache(maxsize=1024)
+def _term_vector(text: str):
+    """
+    Term-count vector for a text, with its L2 norm.
+    Cached so repeated job descriptions / resumes are only tokenized once.
+    """
+    counts = Counter(
+        token for token in _TOKEN_RE.findall(text.lower())
+        if token not in ENGLISH_STOP_WORDS
+    )
+    norm = math.sqrt(sum(c * c for c in counts.values()))
+    return counts, norm
 
-def calculate_text_similarity(text1: str, text2: str):
+def calculate_text_similarity(text1: str, text2: str, use_tfidf: bool = False):
     """
     Calculates cosine similarity between two texts (e.g., Job Desc vs Resume/Interview).
     Returns a score between 0 and 100.
+    
+    By default compares stopword-filtered term counts, which avoids fitting a
+    TfidfVectorizer per pair. Pass use_tfidf=True for the TF-IDF weighted score.
     """
     if not text1 or not text2:
         return 0.0
-        
+    
+    if use_tfidf:
+        return _tfidf_similarity(text1, text2)
+    
+    counts1, norm1 = _term_vector(text1)
+    counts2, norm2 = _term_vector(text2)
+    if not norm1 or not norm2:
+        return 0.0
+    
+    if len(counts1) > len(counts2):
+        counts1, counts2 = counts2, counts1
+    dot = sum(count * counts2[token] for token, count in counts1.items() if token in counts2)
+    return round(dot / (norm1 * norm2) * 100, 2)
+
+def _tfidf_similarity(text1: str, text2: str):
+    """TF-IDF cosine similarity between two texts, scaled to 0-100"""
     documents = [text1, text2]
     tfidf = TfidfVectorizer(stop_words='english')
     try:
@@ -4,11 +4,132 @@ Handles employee acknowledgment of received IT assets and setup
 """
 
 import asyncio
+import logging
+from dataclasses import dataclass, fields
 from datetime import datetime
+from functools import lru_cache
+from operator import attrgetter
 from typing import Dict, List, Optional
-from sqlalchemy.orm import Session
-from . import models
+from sqlalchemy import and_, insert, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from . import models, schemas
+from .database import SessionLocal
 from .notification_service import NotificationService
+from .role_utils import get_active_user_ids_by_roles
+
+logger = logging.getLogger(__name__)
+
+def _get_admin_user_ids() -> List[int]:
+    """Active admin/HR user ids, read with a session owned by the calling worker thread
+    
+    The request session must not be shared with a worker thread, so the
+    lookup opens its own.
+    """
+    db = SessionLocal()
+    try:
+        return get_active_user_ids_by_roles(db, ("admin", "hr"))
+    finally:
+        db.close()
+
+
+@dataclass(frozen=True)
+class AckSnapshot:
+    """Plain copy of the acknowledgment fields the notification helpers read.
+    
+    Taken before commit so formatting never touches expired ORM attributes.
+    """
+    id: int
+    employee_id: Optional[int]
+    employee_name: str
+    department: str
+    issues_reported: Optional[str] = None
+    review_status: Optional[str] = None
+    admin_comments: Optional[str] = None
+    laptop_received: bool = False
+    email_received: bool = False
+    wifi_access_received: bool = False
+    id_card_received: bool = False
+    biometric_setup_completed: bool = False
+    system_login_working: bool = False
+    email_login_working: bool = False
+    vpn_access_working: bool = False
+    
+    @classmethod
+    def from_model(cls, acknowledgment: models.AssetAcknowledgment) -> "AckSnapshot":
+        return cls(**{f.name: getattr(acknowledgment, f.name) for f in fields(cls)})
+    
+    @classmethod
+    def from_values(cls, acknowledgment_id: int, values: Dict) -> "AckSnapshot":
+        return cls(id=acknowledgment_id, **{
+            f.name: values[f.name] for f in fields(cls) if f.name in values
+        })
+
+
+_SNAPSHOT_COLUMNS = tuple(getattr(models.AssetAcknowledgment, f.name) for f in fields(AckSnapshot))
+
+# review_status -> workflow status set alongside it
+_REVIEW_STATUS_TRANSITIONS = {
+    "approved": "completed",
+    "needs_action": "under_review"
+}
+
+
+# Extra fields of the detailed view, read in one attrgetter call
+_DETAIL_KEYS = (
+    "date_of_joining",
+    
+    # Received Items
+    "laptop_received", "laptop_serial_number", "laptop_model", "laptop_condition",
+    "email_received", "email_address", "email_password_received",
+    "wifi_access_received", "wifi_credentials_received",
+    "id_card_received", "id_card_number",
+    "biometric_setup_completed", "biometric_type",
+    
+    # Additional Items
+    "monitor_received", "monitor_serial_number", "keyboard_received", "mouse_received",
+    "headset_received", "mobile_received", "mobile_number",
+    
+    # Login Status
+    "system_login_working", "email_login_working", "vpn_access_working",
+    
+    # Comments and Issues
+    "employee_comments", "issues_reported", "additional_requirements", "admin_comments",
+    
+    "acknowledgment_date"
+)
+_DETAIL_DATETIME_KEYS = ("date_of_joining", "acknowledgment_date")
+_get_detail_values = attrgetter(*_DETAIL_KEYS)
+
+
+# (attribute, label) rows of the admin notification checklist
+_RECEIVED_ITEMS = (
+    ("laptop_received", "Laptop"),
+    ("email_received", "Email Setup"),
+    ("wifi_access_received", "WiFi Access"),
+    ("id_card_received", "ID Card"),
+    ("biometric_setup_completed", "Biometric Setup")
+)
+_LOGIN_ITEMS = (
+    ("system_login_working", "System Login"),
+    ("email_login_working", "Email Login"),
+    ("vpn_access_working", "VPN Access")
+)
+_CHECKLIST_ATTRS = tuple(attr for attr, _ in _RECEIVED_ITEMS + _LOGIN_ITEMS)
+
+
+@lru_cache(maxsize=128)
+def _admin_checklist_block(flags: tuple) -> str:
+    """Items/login checklist of the admin notification, keyed by the flags of _CHECKLIST_ATTRS"""
+    received_flags, login_flags = flags[:len(_RECEIVED_ITEMS)], flags[len(_RECEIVED_ITEMS):]
+    items_block = "\n".join(
+        f"{'✅' if ok else '❌'} {label}"
+        for (_, label), ok in zip(_RECEIVED_ITEMS, received_flags)
+    )
+    login_block = "\n".join(
+        f"✅ {label} Working" if ok else f"❌ {label} Issues"
+        for (_, label), ok in zip(_LOGIN_ITEMS, login_flags)
+    )
+    return f"Items Acknowledged:\n{items_block}\n\nLogin Status:\n{login_block}"
 
 
 class AssetAcknowledgmentService:
@@ -19,129 +140,116 @@ class AssetAcknowledgmentService:
     def create_acknowledgment(
         self,
         employee_id: int,
-        acknowledgment_data: Dict,
-        infrastructure_request_id: Optional[int] = None
+        acknowledgment_data: schemas.AcknowledgmentInput,
+        infrastructure_request_id: Optional[int] = None,
+        notify: bool = True
     ) -> Dict:
-        """Create asset acknowledgment form submission"""
+        """Create asset acknowledgment form submission
+        
+        Pass notify=False when admin notifications are dispatched separately,
+        e.g. via send_ack_admin_notification in a background task.
+        """
         
         employee = self.db.query(models.Employee).filter(models.Employee.id == employee_id).first()
         if not employee:
             return {"success": False, "message": "Employee not found"}
         
-        # Create acknowledgment record
-        acknowledgment = models.AssetAcknowledgment(
+        # Create acknowledgment record; profile fallbacks are only built when a field is missing
+        values = acknowledgment_data.model_dump()
+        values.update(
             employee_id=employee_id,
             infrastructure_request_id=infrastructure_request_id,
-            employee_name=acknowledgment_data.get("employee_name", f"{employee.first_name} {employee.last_name}"),
-            employee_id_number=acknowledgment_data.get("employee_id_number", str(employee_id)),
-            department=acknowledgment_data.get("department", employee.department or ""),
-            date_of_joining=acknowledgment_data.get("date_of_joining", employee.date_of_joining or datetime.utcnow()),
-            
-            # Received Items
-            laptop_received=acknowledgment_data.get("laptop_received", False),
-            laptop_serial_number=acknowledgment_data.get("laptop_serial_number"),
-            laptop_model=acknowledgment_data.get("laptop_model"),
-            laptop_condition=acknowledgment_data.get("laptop_condition"),
-            
-            email_received=acknowledgment_data.get("email_received", False),
-            email_address=acknowledgment_data.get("email_address"),
-            email_password_received=acknowledgment_data.get("email_password_received", False),
-            
-            wifi_access_received=acknowledgment_data.get("wifi_access_received", False),
-            wifi_credentials_received=acknowledgment_data.get("wifi_credentials_received", False),
-            
-            id_card_received=acknowledgment_data.get("id_card_received", False),
-            id_card_number=acknowledgment_data.get("id_card_number"),
-            
-            biometric_setup_completed=acknowledgment_data.get("biometric_setup_completed", False),
-            biometric_type=acknowledgment_data.get("biometric_type"),
-            
-            # Additional Items
-            monitor_received=acknowledgment_data.get("monitor_received", False),
-            monitor_serial_number=acknowledgment_data.get("monitor_serial_number"),
-            keyboard_received=acknowledgment_data.get("keyboard_received", False),
-            mouse_received=acknowledgment_data.get("mouse_received", False),
-            headset_received=acknowledgment_data.get("headset_received", False),
-            mobile_received=acknowledgment_data.get("mobile_received", False),
-            mobile_number=acknowledgment_data.get("mobile_number"),
-            
-            # Login Credentials
-            system_login_working=acknowledgment_data.get("system_login_working", False),
-            email_login_working=acknowledgment_data.get("email_login_working", False),
-            vpn_access_working=acknowledgment_data.get("vpn_access_working", False),
-            
-            # Employee Acknowledgment
-            employee_signature=acknowledgment_data.get("employee_signature", "Digital Confirmation"),
-            employee_comments=acknowledgment_data.get("employee_comments"),
-            issues_reported=acknowledgment_data.get("issues_reported"),
-            additional_requirements=acknowledgment_data.get("additional_requirements")
+            employee_name=acknowledgment_data.employee_name or f"{employee.first_name} {employee.last_name}",
+            employee_id_number=acknowledgment_data.employee_id_number or str(employee_id),
+            department=acknowledgment_data.department or employee.department or "",
+            date_of_joining=acknowledgment_data.date_of_joining or employee.date_of_joining or datetime.utcnow()
         )
         
-        self.db.add(acknowledgment)
+        # Core INSERT ... RETURNING id: no ORM instance, no refresh round trip
+        acknowledgment_id = self.db.execute(
+            insert(models.AssetAcknowledgment).values(**values).returning(models.AssetAcknowledgment.id)
+        ).scalar_one()
         self.db.commit()
-        self.db.refresh(acknowledgment)
         
         # Notify admin about new acknowledgment
-        self._notify_admin_new_acknowledgment(acknowledgment)
+        if notify:
+            self._notify_admin_new_acknowledgment(AckSnapshot.from_values(acknowledgment_id, values))
         
         return {
             "success": True,
             "message": "Asset acknowledgment submitted successfully",
-            "acknowledgment_id": acknowledgment.id,
-            "reference_number": f"ACK-{acknowledgment.id:06d}"
+            "acknowledgment_id": acknowledgment_id,
+            "reference_number": f"ACK-{acknowledgment_id:06d}"
         }
     
-    def get_pending_acknowledgments(self) -> List[Dict]:
+    def get_pending_acknowledgments(self) -> List[schemas.AcknowledgmentOut]:
         """Get all pending acknowledgments for admin review"""
-        acknowledgments = self.db.query(models.AssetAcknowledgment).filter(
+        acknowledgments = self.db.query(models.AssetAcknowledgment).options(
+            selectinload(models.AssetAcknowledgment.reviewer)
+        ).filter(
             models.AssetAcknowledgment.review_status == "pending"
         ).order_by(models.AssetAcknowledgment.created_at.desc()).all()
         
-        return [self._format_acknowledgment(ack) for ack in acknowledgments]
+        return [schemas.AcknowledgmentOut.model_validate(ack) for ack in acknowledgments]
     
     def review_acknowledgment(
         self,
         acknowledgment_id: int,
         reviewer_id: int,
         review_status: str,
-        admin_comments: str = None
+        admin_comments: str = None,
+        notify: bool = True
     ) -> Dict:
-        """Admin reviews and approves/rejects acknowledgment"""
-        acknowledgment = self.db.query(models.AssetAcknowledgment).filter(
-            models.AssetAcknowledgment.id == acknowledgment_id
-        ).first()
+        """Admin reviews and approves/rejects acknowledgment
         
-        if not acknowledgment:
-            return {"success": False, "message": "Acknowledgment not found"}
+        Pass notify=False when the employee notification is dispatched
+        separately, e.g. via send_ack_review_notification in a background task.
+        """
+        values = {
+            "reviewed_by": reviewer_id,
+            "review_status": review_status,
+            "admin_comments": admin_comments,
+            "reviewed_at": datetime.utcnow()
+        }
+        new_status = _REVIEW_STATUS_TRANSITIONS.get(review_status)
+        if new_status:
+            values["status"] = new_status
         
-        acknowledgment.reviewed_by = reviewer_id
-        acknowledgment.review_status = review_status
-        acknowledgment.admin_comments = admin_comments
-        acknowledgment.reviewed_at = datetime.utcnow()
+        # Single UPDATE ... RETURNING the snapshot columns instead of loading the full row
+        row = self.db.execute(
+            update(models.AssetAcknowledgment)
+            .where(models.AssetAcknowledgment.id == acknowledgment_id)
+            .values(**values)
+            .returning(*_SNAPSHOT_COLUMNS)
+        ).first()
         
-        if review_status == "approved":
-            acknowledgment.status = "completed"
-        elif review_status == "needs_action":
-            acknowledgment.status = "under_review"
+        if row is None:
+            self.db.rollback()
+            return {"success": False, "message": "Acknowledgment not found"}
         
         self.db.commit()
         
         # Notify employee about review result
-        self._notify_employee_review_result(acknowledgment)
+        if notify:
+            self._notify_employee_review_result(AckSnapshot(**row._mapping))
         
         return {"success": True, "message": f"Acknowledgment {review_status} successfully"}
     
-    def get_employee_acknowledgments(self, employee_id: int) -> List[Dict]:
+    def get_employee_acknowledgments(self, employee_id: int) -> List[schemas.AcknowledgmentOut]:
         """Get acknowledgments for specific employee"""
-        acknowledgments = self.db.query(models.AssetAcknowledgment).filter(
+        acknowledgments = self.db.query(models.AssetAcknowledgment).options(
+            selectinload(models.AssetAcknowledgment.reviewer)
+        ).filter(
             models.AssetAcknowledgment.employee_id == employee_id
         ).order_by(models.AssetAcknowledgment.created_at.desc()).all()
         
-        return [self._format_acknowledgment(ack) for ack in acknowledgments]
+        return [schemas.AcknowledgmentOut.model_validate(ack) for ack in acknowledgments]
     
     def get_acknowledgment_details(self, acknowledgment_id: int) -> Dict:
         """Get detailed acknowledgment information"""
-        acknowledgment = self.db.query(models.AssetAcknowledgment).filter(
+        acknowledgment = self.db.query(models.AssetAcknowledgment).options(
+            joinedload(models.AssetAcknowledgment.reviewer)
+        ).filter(
             models.AssetAcknowledgment.id == acknowledgment_id
         ).first()
         
@@ -152,23 +260,28 @@ class AssetAcknowledgmentService:
     
     def check_pending_acknowledgment(self, employee_id: int) -> Dict:
         """Check if employee has pending infrastructure setup to acknowledge"""
-        # Check if there's a completed infrastructure request without acknowledgment
-        completed_request = self.db.query(models.InfrastructureRequest).filter(
+        # Find a completed infrastructure request and the id of any acknowledgment of it
+        # in one round trip; only the ack id is selected, no ORM row is built for it
+        row = self.db.query(
+            models.InfrastructureRequest, models.AssetAcknowledgment.id
+        ).outerjoin(
+            models.AssetAcknowledgment,
+            and_(
+                models.AssetAcknowledgment.infrastructure_request_id == models.InfrastructureRequest.id,
+                models.AssetAcknowledgment.employee_id == employee_id
+            )
+        ).filter(
             models.InfrastructureRequest.employee_id == employee_id,
             models.InfrastructureRequest.status == "completed"
         ).first()
         
-        if not completed_request:
+        if not row:
             return {"has_pending": False}
         
-        # Check if acknowledgment already exists
-        existing_ack = self.db.query(models.AssetAcknowledgment).filter(
-            models.AssetAcknowledgment.employee_id == employee_id,
-            models.AssetAcknowledgment.infrastructure_request_id == completed_request.id
-        ).first()
+        completed_request, existing_ack_id = row
         
-        if existing_ack:
-            return {"has_pending": False, "existing_acknowledgment": existing_ack.id}
+        if existing_ack_id:
+            return {"has_pending": False, "existing_acknowledgment": existing_ack_id}
         
         return {
             "has_pending": True,
@@ -184,128 +297,81 @@ class AssetAcknowledgmentService:
             }
         }
     
-    def _format_acknowledgment(self, acknowledgment: models.AssetAcknowledgment) -> Dict:
-        """Format acknowledgment for API response"""
-        return {
-            "id": acknowledgment.id,
-            "reference_number": f"ACK-{acknowledgment.id:06d}",
-            "employee_id": acknowledgment.employee_id,
-            "employee_name": acknowledgment.employee_name,
-            "employee_id_number": acknowledgment.employee_id_number,
-            "department": acknowledgment.department,
-            "status": acknowledgment.status,
-            "review_status": acknowledgment.review_status,
-            "created_at": acknowledgment.created_at.isoformat() if acknowledgment.created_at else None,
-            "reviewed_at": acknowledgment.reviewed_at.isoformat() if acknowledgment.reviewed_at else None,
-            "has_issues": bool(acknowledgment.issues_reported),
-            "reviewer_name": acknowledgment.reviewer.email if acknowledgment.reviewer else None
-        }
-    
     def _format_acknowledgment_detailed(self, acknowledgment: models.AssetAcknowledgment) -> Dict:
         """Format detailed acknowledgment information"""
-        base_info = self._format_acknowledgment(acknowledgment)
+        base_info = schemas.AcknowledgmentOut.model_validate(acknowledgment).model_dump(mode="json")
         
-        base_info.update({
-            "date_of_joining": acknowledgment.date_of_joining.isoformat() if acknowledgment.date_of_joining else None,
-            
-            # Received Items
-            "laptop_received": acknowledgment.laptop_received,
-            "laptop_serial_number": acknowledgment.laptop_serial_number,
-            "laptop_model": acknowledgment.laptop_model,
-            "laptop_condition": acknowledgment.laptop_condition,
-            
-            "email_received": acknowledgment.email_received,
-            "email_address": acknowledgment.email_address,
-            "email_password_received": acknowledgment.email_password_received,
-            
-            "wifi_access_received": acknowledgment.wifi_access_received,
-            "wifi_credentials_received": acknowledgment.wifi_credentials_received,
-            
-            "id_card_received": acknowledgment.id_card_received,
-            "id_card_number": acknowledgment.id_card_number,
-            
-            "biometric_setup_completed": acknowledgment.biometric_setup_completed,
-            "biometric_type": acknowledgment.biometric_type,
-            
-            # Additional Items
-            "monitor_received": acknowledgment.monitor_received,
-            "monitor_serial_number": acknowledgment.monitor_serial_number,
-            "keyboard_received": acknowledgment.keyboard_received,
-            "mouse_received": acknowledgment.mouse_received,
-            "headset_received": acknowledgment.headset_received,
-            "mobile_received": acknowledgment.mobile_received,
-            "mobile_number": acknowledgment.mobile_number,
-            
-            # Login Status
-            "system_login_working": acknowledgment.system_login_working,
-            "email_login_working": acknowledgment.email_login_working,
-            "vpn_access_working": acknowledgment.vpn_access_working,
-            
-            # Comments and Issues
-            "employee_comments": acknowledgment.employee_comments,
-            "issues_reported": acknowledgment.issues_reported,
-            "additional_requirements": acknowledgment.additional_requirements,
-            "admin_comments": acknowledgment.admin_comments,
-            
-            "acknowledgment_date": acknowledgment.acknowledgment_date.isoformat() if acknowledgment.acknowledgment_date else None
-        })
+        details = dict(zip(_DETAIL_KEYS, _get_detail_values(acknowledgment)))
+        for key in _DETAIL_DATETIME_KEYS:
+            if details[key]:
+                details[key] = details[key].isoformat()
+        base_info.update(details)
         
         return base_info
     
-    def _notify_admin_new_acknowledgment(self, acknowledgment: models.AssetAcknowledgment):
+    def _notify_admin_new_acknowledgment(self, acknowledgment: AckSnapshot):
         """Notify admin about new asset acknowledgment submission"""
-        # Get all admin and HR users
-        admin_users = self.db.query(models.User).filter(
-            models.User.role.in_(["admin", "hr"]),
-            models.User.is_active == True
-        ).all()
+        try:
+            # Called from background tasks in the threadpool: a private loop per call,
+            # so a slow SMTP exchange only holds up this notification
+            asyncio.run(self._notify_admin_async(acknowledgment))
+        except Exception:
+            logger.exception("Failed to send admin notifications")
+    
+    async def _notify_admin_async(self, acknowledgment: AckSnapshot):
+        """Look up admin/HR recipients in a worker thread while the message is formatted, then bulk send"""
+        lookup = asyncio.create_task(asyncio.to_thread(_get_admin_user_ids))
+        message = self._format_admin_message(acknowledgment)
+        admin_user_ids = await lookup
+        if not admin_user_ids:
+            return
         
-        message = f"""📋 New Asset Acknowledgment Submitted
-
-Employee: {acknowledgment.employee_name}
-Reference: ACK-{acknowledgment.id:06d}
-Department: {acknowledgment.department}
-
-Items Acknowledged:
-{'✅ Laptop' if acknowledgment.laptop_received else '❌ Laptop'}
-{'✅ Email Setup' if acknowledgment.email_received else '❌ Email Setup'}
-{'✅ WiFi Access' if acknowledgment.wifi_access_received else '❌ WiFi Access'}
-{'✅ ID Card' if acknowledgment.id_card_received else '❌ ID Card'}
-{'✅ Biometric Setup' if acknowledgment.biometric_setup_completed else '❌ Biometric Setup'}
-
-Login Status:
-{'✅ System Login Working' if acknowledgment.system_login_working else '❌ System Login Issues'}
-{'✅ Email Login Working' if acknowledgment.email_login_working else '❌ Email Login Issues'}
-{'✅ VPN Access Working' if acknowledgment.vpn_access_working else '❌ VPN Access Issues'}
-
-{f"⚠️ Issues Reported: {acknowledgment.issues_reported}" if acknowledgment.issues_reported else "✅ No Issues Reported"}
-
-Please review and approve this acknowledgment."""
+        # One bulk send: a single recipient lookup and one SMTP session for all admins.
+        # Like the lookup, it reads and writes through a session this coroutine owns.
+        db = SessionLocal()
+        try:
+            outcome = await NotificationService(db).send_bulk_notification(
+                user_ids=admin_user_ids,
+                subject="📋 New Asset Acknowledgment",
+                message=message,
+                channels=["email"]
+            )
+        finally:
+            db.close()
         
-        for user in admin_users:
-            try:
-                # Run async notification in a new event loop
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(
-                    self.notification_service.send_notification(
-                        user_id=user.id,
-                        subject="📋 New Asset Acknowledgment",
-                        message=message,
-                        channels=["email"]
-                    )
-                )
-                loop.close()
-            except Exception as e:
-                print(f"Failed to send notification to admin {user.id}: {e}")
+        for user_id, channels in outcome["results"].items():
+            if not any(channels.values()):
+                logger.error("Failed to send notification to admin %s", user_id)
     
-    def _notify_employee_review_result(self, acknowledgment: models.AssetAcknowledgment):
+    def _format_admin_message(self, acknowledgment: AckSnapshot) -> str:
+        """Build the admin notification body; the checklist part is cached by its flags"""
+        checklist = _admin_checklist_block(
+            tuple(bool(getattr(acknowledgment, attr)) for attr in _CHECKLIST_ATTRS)
+        )
+        header = (
+            "📋 New Asset Acknowledgment Submitted\n\n"
+            f"Employee: {acknowledgment.employee_name}\n"
+            f"Reference: ACK-{acknowledgment.id:06d}\n"
+            f"Department: {acknowledgment.department}"
+        )
+        if acknowledgment.issues_reported:
+            issues_line = f"⚠️ Issues Reported: {acknowledgment.issues_reported}"
+        else:
+            issues_line = "✅ No Issues Reported"
+        
+        return "\n\n".join(
+            (header, checklist, issues_line, "Please review and approve this acknowledgment.")
+        )
+    
+    def _notify_employee_review_result(self, acknowledgment: AckSnapshot):
         """Notify employee about acknowledgment review result"""
-        employee_user = self.db.query(models.User).filter(
-            models.User.id == acknowledgment.employee.user_id
-        ).first()
+        employee_user_id = self.db.query(models.User.id).join(
+            models.Employee, models.Employee.user_id == models.User.id
+        ).filter(
+            models.Employee.id == acknowledgment.employee_id
+        ).scalar()
         
-        if not employee_user:
+        if not employee_user_id:
             return
         
         if acknowledgment.review_status == "approved":
@@ -334,17 +400,43 @@ Please address the issues mentioned and resubmit if necessary."""
             return
         
         try:
-            # Run async notification in a new event loop
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(
+            asyncio.run(
                 self.notification_service.send_notification(
-                    user_id=employee_user.id,
+                    user_id=employee_user_id,
                     subject=title,
                     message=message,
                     channels=["email"]
                 )
             )
-            loop.close()
-        except Exception as e:
-            print(f"Failed to send notification to employee {employee_user.id}: {e}")
\ No newline at end of file
+        except Exception:
+            logger.exception("Failed to send notification to employee %s", employee_user_id)
+
+
+def send_ack_admin_notification(acknowledgment_id: int):
+    """Background task: notify admins about a new acknowledgment using its own session"""
+    db = SessionLocal()
+    try:
+        acknowledgment = db.query(models.AssetAcknowledgment).filter(
+            models.AssetAcknowledgment.id == acknowledgment_id
+        ).first()
+        if acknowledgment:
+            AssetAcknowledgmentService(db)._notify_admin_new_acknowledgment(
+                AckSnapshot.from_model(acknowledgment)
+            )
+    finally:
+        db.close()
+
+
+def send_ack_review_notification(acknowledgment_id: int):
+    """Background task: notify the employee about a review result using its own session"""
+    db = SessionLocal()
+    try:
+        acknowledgment = db.query(models.AssetAcknowledgment).filter(
+            models.AssetAcknowledgment.id == acknowledgment_id
+        ).first()
+        if acknowledgment:
+            AssetAcknowledgmentService(db)._notify_employee_review_result(
+                AckSnapshot.from_model(acknowledgment)
+            )
+    finally:
+        db.close()
@@ -4,18 +4,165 @@ Handles asset requests, assignments, and complaints workflow
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, event, exists, insert, or_, update
 from . import models
+from .database import SessionLocal
 from .notification_service import NotificationService
+from .role_utils import get_active_user_ids_by_roles
 import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Columns read by the list endpoints; the joined employee/asset columns are labelled
+# so they don't clash with the request/complaint columns of the same name
+_REQUEST_LIST_COLUMNS = (
+    models.AssetRequest.id,
+    models.AssetRequest.employee_id,
+    models.AssetRequest.request_type,
+    models.AssetRequest.reason,
+    models.AssetRequest.priority,
+    models.AssetRequest.status,
+    models.AssetRequest.created_at,
+    models.AssetRequest.manager_notes,
+    models.AssetRequest.hr_notes,
+    models.AssetRequest.assets_team_notes,
+    models.Employee.id.label("employee_pk"),
+    models.Employee.first_name,
+    models.Employee.last_name
+)
+
+_COMPLAINT_LIST_COLUMNS = (
+    models.AssetComplaint.id,
+    models.AssetComplaint.employee_id,
+    models.AssetComplaint.asset_id,
+    models.AssetComplaint.title,
+    models.AssetComplaint.description,
+    models.AssetComplaint.complaint_type,
+    models.AssetComplaint.priority,
+    models.AssetComplaint.impact_level,
+    models.AssetComplaint.status,
+    models.AssetComplaint.created_at,
+    models.AssetComplaint.assigned_to,
+    models.AssetComplaint.resolution_notes,
+    models.Employee.id.label("employee_pk"),
+    models.Employee.first_name,
+    models.Employee.last_name,
+    models.Asset.name.label("asset_name")
+)
+
+
+# Display names for complaint types in assets team notifications
+_ISSUE_TYPE_MAP = {
+    'hardware_issue': '💻 Hardware Issue',
+    'software_issue': '🖥️ Software Issue',
+    'network_issue': '📶 Network Issue',
+    'email_issue': '📧 Email Issue',
+    'performance': '⚡ Performance Issue',
+    'damage': '🔧 Physical Damage',
+    'theft': '🚨 Theft/Loss',
+    'other': '❓ Other IT Issue'
+}
+
+_COMPLAINT_TEMPLATE = """🚨 New IT Issue Reported
+
+Employee: {employee_name}
+Ticket: {ticket_number}
+Issue: {title}
+
+Type: {issue_type}
+Priority: {priority}
+Impact: {impact_level}
+
+Description:
+{description}
+
+{asset_info}
+
+Please investigate and resolve this IT issue promptly."""
+
+_EMPLOYEE_RESOLVED_TEMPLATE = """✅ Your IT Issue Has Been Resolved
+
+Ticket: {ticket_number}
+Issue: {title}
+
+Resolution: {resolution_action}
+Details: {resolution_notes}
+
+Your IT issue has been resolved by our Assets Team. If you continue to experience problems, please report a new issue."""
+
+_MANAGERS_RESOLVED_TEMPLATE = """✅ IT Issue Resolved
+
+Employee: {employee_name}
+Ticket: {ticket_number}
+Issue: {title}
+
+Resolution: {resolution_action}
+Resolved by: Assets Team
+
+The IT issue has been successfully resolved."""
+
+
+# employee_id -> (loaded_at, user_id) for the "employee creates own request" flow
+_EMPLOYEE_USER_ID_TTL = 60  # seconds
+_EMPLOYEE_USER_ID_MAXSIZE = 10000
+_employee_user_id_cache: Dict[int, Tuple[float, int]] = {}
+
+def _get_employee_user_id(db: Session, employee_id: int) -> Optional[int]:
+    """Look up an employee's user_id, cached briefly and dropped whenever an Employee row changes"""
+    cached = _employee_user_id_cache.get(employee_id)
+    if cached and time.monotonic() - cached[0] < _EMPLOYEE_USER_ID_TTL:
+        return cached[1]
+    
+    user_id = db.query(models.Employee.user_id).filter(models.Employee.id == employee_id).scalar()
+    if user_id is not None:
+        if len(_employee_user_id_cache) >= _EMPLOYEE_USER_ID_MAXSIZE:
+            _employee_user_id_cache.clear()
+        _employee_user_id_cache[employee_id] = (time.monotonic(), user_id)
+    return user_id
+
+def invalidate_employee_user_id_cache(*args):
+    """Drop cached employee -> user ids; wired to Employee update/delete events"""
+    _employee_user_id_cache.clear()
+
+for _employee_event in ("after_update", "after_delete"):
+    event.listen(models.Employee, _employee_event, invalidate_employee_user_id_cache)
+
+# session.info key for in-app notification rows queued until the session commits
+_PENDING_NOTIFICATIONS_KEY = "asset_pending_notifications"
+
+def _flush_queued_notifications(session: Session):
+    """after_commit hook: write all queued notifications in one INSERT"""
+    rows = session.info.pop(_PENDING_NOTIFICATIONS_KEY, None)
+    if not rows:
+        return
+    
+    try:
+        # The session can't emit SQL inside after_commit, so use a fresh transaction
+        with session.get_bind().begin() as connection:
+            connection.execute(insert(models.InAppNotification), rows)
+    except Exception:
+        # Don't let notification errors affect the committed change
+        logger.exception("Error writing queued notifications")
+
+def _discard_queued_notifications(session: Session):
+    """after_rollback hook: drop notifications for work that never committed"""
+    session.info.pop(_PENDING_NOTIFICATIONS_KEY, None)
 
 
 class AssetManagementService:
     def __init__(self, db: Session):
         self.db = db
         self.notification_service = NotificationService(db)
+        
+        # In-app notification rows queued by the _notify_* helpers are written after
+        # commit; hook the session once, however many services are built on it
+        if not event.contains(self.db, "after_commit", _flush_queued_notifications):
+            event.listen(self.db, "after_commit", _flush_queued_notifications)
+            event.listen(self.db, "after_rollback", _discard_queued_notifications)
     
     def create_asset_request(
         self, 
@@ -31,9 +178,7 @@ class AssetManagementService:
         
         # If no requester specified, assume employee is requesting for themselves
         if requested_by is None:
-            employee = self.db.query(models.Employee).filter(models.Employee.id == employee_id).first()
-            if employee and employee.user_id:
-                requested_by = employee.user_id
+            requested_by = _get_employee_user_id(self.db, employee_id) or None
         
         asset_request = models.AssetRequest(
             employee_id=employee_id,
@@ -46,12 +191,21 @@ class AssetManagementService:
         )
         
         self.db.add(asset_request)
-        self.db.commit()
-        self.db.refresh(asset_request)
+        self.db.flush()
+        
+        # One item row per requested asset, in submission order, inserted in a single executemany
+        if requested_assets:
+            self.db.execute(insert(models.AssetRequestItem), [
+                {"request_id": asset_request.id, "asset_type_code": code, "quantity": 1, "position": position}
+                for position, code in enumerate(requested_assets)
+            ])
         
-        # Notify manager for approval
+        # Notify manager for approval (delivered once the commit succeeds)
         self._notify_manager_for_approval(asset_request)
         
+        self.db.commit()
+        self.db.refresh(asset_request)
+        
         return {
             "success": True,
             "message": "Asset request created successfully",
@@ -61,58 +215,71 @@ class AssetManagementService:
     
     def approve_by_manager(self, request_id: int, manager_id: int, notes: str = None) -> Dict:
         """Manager approves asset request"""
-        request = self.db.query(models.AssetRequest).filter(models.AssetRequest.id == request_id).first()
-        
-        if not request:
-            return {"success": False, "message": "Request not found"}
-        
-        if request.status != "pending":
+        # Status check and transition in one conditional UPDATE
+        request = self.db.execute(
+            update(models.AssetRequest).where(
+                models.AssetRequest.id == request_id,
+                models.AssetRequest.status == "pending"
+            ).values(
+                approved_by_manager=manager_id,
+                manager_approved_at=datetime.utcnow(),
+                manager_notes=notes,
+                status="manager_approved"
+            ).returning(models.AssetRequest.id, models.AssetRequest.employee_id)
+        ).first()
+        
+        if request is None:
+            if not self._row_exists(models.AssetRequest, request_id):
+                return {"success": False, "message": "Request not found"}
             return {"success": False, "message": "Request is not in pending status"}
         
-        request.approved_by_manager = manager_id
-        request.manager_approved_at = datetime.utcnow()
-        request.manager_notes = notes
-        request.status = "manager_approved"
+        # Notify HR for approval (delivered once the commit succeeds)
+        self._notify_hr_for_approval(request)
         
         self.db.commit()
         
-        # Notify HR for approval
-        self._notify_hr_for_approval(request)
-        
         return {"success": True, "message": "Request approved by manager"}
     
     def approve_by_hr(self, request_id: int, hr_id: int, notes: str = None) -> Dict:
         """HR approves asset request"""
-        request = self.db.query(models.AssetRequest).filter(models.AssetRequest.id == request_id).first()
-        
-        if not request:
-            return {"success": False, "message": "Request not found"}
-        
-        if request.status != "manager_approved":
+        request = self.db.execute(
+            update(models.AssetRequest).where(
+                models.AssetRequest.id == request_id,
+                models.AssetRequest.status == "manager_approved"
+            ).values(
+                approved_by_hr=hr_id,
+                hr_approved_at=datetime.utcnow(),
+                hr_notes=notes,
+                status="hr_approved"
+            ).returning(models.AssetRequest.id, models.AssetRequest.employee_id)
+        ).first()
+        
+        if request is None:
+            if not self._row_exists(models.AssetRequest, request_id):
+                return {"success": False, "message": "Request not found"}
             return {"success": False, "message": "Request must be approved by manager first"}
         
-        request.approved_by_hr = hr_id
-        request.hr_approved_at = datetime.utcnow()
-        request.hr_notes = notes
-        request.status = "hr_approved"
+        # Notify assets team (delivered once the commit succeeds)
+        self._notify_assets_team(request)
         
         self.db.commit()
         
-        # Notify assets team
-        self._notify_assets_team(request)
-        
         return {"success": True, "message": "Request approved by HR"}
     
     def assign_to_assets_team(self, request_id: int, assets_team_member_id: int) -> Dict:
         """Assign request to assets team member"""
-        request = self.db.query(models.AssetRequest).filter(models.AssetRequest.id == request_id).first()
-        
-        if not request:
+        request = self.db.execute(
+            update(models.AssetRequest).where(
+                models.AssetRequest.id == request_id
+            ).values(
+                assigned_to_assets_team=assets_team_member_id,
+                status="assigned_to_assets"
+            ).returning(models.AssetRequest.id)
+        ).first()
+        
+        if request is None:
             return {"success": False, "message": "Request not found"}
         
-        request.assigned_to_assets_team = assets_team_member_id
-        request.status = "assigned_to_assets"
-        
         self.db.commit()
         
         return {"success": True, "message": "Request assigned to assets team"}
@@ -126,60 +293,85 @@ class AssetManagementService:
     ) -> Dict:
         """Fulfill asset request by assigning specific assets"""
         
-        request = self.db.query(models.AssetRequest).filter(models.AssetRequest.id == request_id).first()
-        
-        if not request:
-            return {"success": False, "message": "Request not found"}
-        
-        if request.status not in ["hr_approved", "assigned_to_assets"]:
+        # One timestamp so assets_assigned_at and completed_at match exactly
+        now = datetime.utcnow()
+        
+        # Claim the request first; the asset updates below share its transaction
+        request = self.db.execute(
+            update(models.AssetRequest).where(
+                models.AssetRequest.id == request_id,
+                models.AssetRequest.status.in_(["hr_approved", "assigned_to_assets"])
+            ).values(
+                status="completed",
+                assets_assigned_at=now,
+                completed_at=now,
+                assets_team_notes=notes
+            ).returning(models.AssetRequest.id, models.AssetRequest.employee_id)
+        ).first()
+        
+        if request is None:
+            if not self._row_exists(models.AssetRequest, request_id):
+                return {"success": False, "message": "Request not found"}
             return {"success": False, "message": "Request not ready for fulfillment"}
         
+        # Load every requested asset that is still available in one IN query
+        asset_ids = [assignment.get("asset_id") for assignment in asset_assignments]
+        available = {
+            row.id: row for row in self.db.query(
+                models.Asset.id, models.Asset.name, models.Asset.serial_number
+            ).filter(
+                models.Asset.id.in_(asset_ids),
+                models.Asset.status == "available"
+            )
+        }
+        
         assigned_assets = []
+        assignment_records = []
         
         for assignment in asset_assignments:
-            asset_id = assignment.get("asset_id")
-            condition = assignment.get("condition", "good")
-            
-            # Get the asset
-            asset = self.db.query(models.Asset).filter(models.Asset.id == asset_id).first()
-            
+            # pop() so an asset listed twice is only assigned once
+            asset = available.pop(assignment.get("asset_id"), None)
             if not asset:
                 continue
             
-            if asset.status != "available":
-                continue
-            
-            # Update asset status
-            asset.status = "assigned"
-            asset.assigned_to = request.employee_id
-            
-            # Create assignment record
-            assignment_record = models.AssetAssignment(
-                asset_id=asset_id,
-                employee_id=request.employee_id,
-                request_id=request_id,
-                assigned_by=assets_team_member_id,
-                condition_at_assignment=condition
-            )
-            
-            self.db.add(assignment_record)
+            assignment_records.append({
+                "asset_id": asset.id,
+                "employee_id": request.employee_id,
+                "request_id": request_id,
+                "assigned_by": assets_team_member_id,
+                "condition_at_assignment": assignment.get("condition", "good")
+            })
             assigned_assets.append({
-                "asset_id": asset_id,
+                "asset_id": asset.id,
                 "name": asset.name,
                 "serial_number": asset.serial_number
             })
         
-        # Update request status
-        request.status = "completed"
-        request.assets_assigned_at = datetime.utcnow()
-        request.completed_at = datetime.utcnow()
-        request.assets_team_notes = notes
-        
-        self.db.commit()
+        if assignment_records:
+            # One UPDATE for the asset statuses and one executemany INSERT for the assignments.
+            # Re-check availability in the UPDATE so an asset claimed by a concurrent
+            # fulfillment since the read above is not assigned twice.
+            claimed = set(self.db.execute(
+                update(models.Asset).where(
+                    models.Asset.id.in_([record["asset_id"] for record in assignment_records]),
+                    models.Asset.status == "available"
+                ).values(status="assigned", assigned_to=request.employee_id).returning(models.Asset.id)
+            ).scalars())
+            if len(claimed) < len(assignment_records):
+                logger.warning(
+                    f"Request {request_id}: {len(assignment_records) - len(claimed)} asset(s) "
+                    "were no longer available and were skipped"
+                )
+                assignment_records = [record for record in assignment_records if record["asset_id"] in claimed]
+                assigned_assets = [asset for asset in assigned_assets if asset["asset_id"] in claimed]
+            if assignment_records:
+                self.db.execute(insert(models.AssetAssignment), assignment_records)
         
-        # Notify employee that assets are ready
+        # Notify employee that assets are ready (delivered once the commit succeeds)
         self._notify_employee_assets_ready(request, assigned_assets)
         
+        self.db.commit()
+        
         return {
             "success": True,
             "message": "Assets assigned successfully",
@@ -194,9 +386,14 @@ class AssetManagementService:
         complaint_type: str,
         asset_id: int = None,
         priority: str = "normal",
-        impact_level: str = "medium"
+        impact_level: str = "medium",
+        notify: bool = True
     ) -> Dict:
-        """Create asset complaint with enhanced notifications"""
+        """Create asset complaint with enhanced notifications
+        
+        Pass notify=False when the assets team notification is dispatched
+        separately, e.g. via send_complaint_created_notifications in a background task.
+        """
         
         complaint = models.AssetComplaint(
             employee_id=employee_id,
@@ -209,30 +406,38 @@ class AssetManagementService:
         )
         
         self.db.add(complaint)
-        self.db.commit()
-        self.db.refresh(complaint)
+        self.db.flush()
         
         # Notify assets team about new complaint with detailed information
-        self._notify_assets_team_complaint(complaint)
+        # (delivered once the commit succeeds)
+        if notify:
+            self._notify_assets_team_complaint(complaint)
+        
+        self.db.commit()
+        self.db.refresh(complaint)
         
         return {
             "success": True,
             "message": "IT issue reported successfully",
             "complaint_id": complaint.id,
-            "ticket_number": f"COMP-{complaint.id:06d}"
+            "ticket_number": complaint.ticket_number
         }
     
     def assign_complaint(self, complaint_id: int, technician_id: int) -> Dict:
         """Assign complaint to technician"""
-        complaint = self.db.query(models.AssetComplaint).filter(models.AssetComplaint.id == complaint_id).first()
-        
-        if not complaint:
+        complaint = self.db.execute(
+            update(models.AssetComplaint).where(
+                models.AssetComplaint.id == complaint_id
+            ).values(
+                assigned_to=technician_id,
+                assigned_at=datetime.utcnow(),
+                status="in_progress"
+            ).returning(models.AssetComplaint.id)
+        ).first()
+        
+        if complaint is None:
             return {"success": False, "message": "Complaint not found"}
         
-        complaint.assigned_to = technician_id
-        complaint.assigned_at = datetime.utcnow()
-        complaint.status = "in_progress"
-        
         self.db.commit()
         
         return {"success": True, "message": "Complaint assigned to technician"}
@@ -242,70 +447,80 @@ class AssetManagementService:
         complaint_id: int, 
         resolution_notes: str,
         resolution_action: str,
-        technician_id: int
+        technician_id: int,
+        notify: bool = True
     ) -> Dict:
-        """Resolve complaint with enhanced notifications"""
-        complaint = self.db.query(models.AssetComplaint).filter(models.AssetComplaint.id == complaint_id).first()
-        
-        if not complaint:
+        """Resolve complaint with enhanced notifications
+        
+        Pass notify=False when the resolution notifications are dispatched
+        separately, e.g. via send_complaint_resolved_notifications in a background task.
+        """
+        resolved = self.db.execute(
+            update(models.AssetComplaint).where(
+                models.AssetComplaint.id == complaint_id
+            ).values(
+                resolution_notes=resolution_notes,
+                resolution_action=resolution_action,
+                resolved_at=datetime.utcnow(),
+                status="resolved"
+            ).returning(models.AssetComplaint.id)
+        ).first()
+        
+        if resolved is None:
             return {"success": False, "message": "Complaint not found"}
         
-        complaint.resolution_notes = resolution_notes
-        complaint.resolution_action = resolution_action
-        complaint.resolved_at = datetime.utcnow()
-        complaint.status = "resolved"
+        if notify:
+            # The notification helpers need the full complaint and its relationships
+            complaint = self.db.get(models.AssetComplaint, complaint_id)
+            
+            # Notify employee about resolution
+            self._notify_employee_complaint_resolved(complaint)
+            
+            # Notify managers and admin about resolution
+            self._notify_managers_complaint_resolved(complaint)
         
+        # Queued notifications are written once this commit succeeds
         self.db.commit()
         
-        # Notify employee about resolution
-        self._notify_employee_complaint_resolved(complaint)
-        
-        # Notify managers and admin about resolution
-        self._notify_managers_complaint_resolved(complaint)
-        
         return {"success": True, "message": "IT issue resolved successfully"}
     
     def get_pending_requests_for_manager(self, manager_id: int) -> List[Dict]:
         """Get pending asset requests for manager approval"""
-        # Get employees under this manager
-        employees = self.db.query(models.Employee).join(models.User).filter(
-            models.User.role.in_(["employee"])
-        ).all()
-        
-        employee_ids = [emp.id for emp in employees]
-        
-        requests = self.db.query(models.AssetRequest).filter(
-            and_(
-                models.AssetRequest.employee_id.in_(employee_ids),
-                models.AssetRequest.status == "pending"
-            )
+        # Requests from employee-role users, filtered in one JOIN rather than an IN list of ids
+        requests = self._request_list_query().join(
+            models.User, models.Employee.user_id == models.User.id
+        ).filter(
+            models.User.role == "employee",
+            models.AssetRequest.status == "pending"
         ).all()
         
-        return [self._format_request(req) for req in requests]
+        return self._format_requests(requests)
     
-    def get_pending_requests_for_hr(self) -> List[Dict]:
-        """Get pending asset requests for HR approval"""
-        requests = self.db.query(models.AssetRequest).filter(
+    def get_pending_requests_for_hr(self, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """Get pending asset requests for HR approval, newest first, one page at a time"""
+        query = self._request_list_query().filter(
             models.AssetRequest.status == "manager_approved"
-        ).all()
+        )
+        requests, next_cursor = self._paginate(query, models.AssetRequest, limit, cursor)
         
-        return [self._format_request(req) for req in requests]
+        return {"items": self._format_requests(requests), "next_cursor": next_cursor}
     
     def get_requests_for_assets_team(self) -> List[Dict]:
         """Get requests for assets team"""
-        requests = self.db.query(models.AssetRequest).filter(
+        requests = self._request_list_query().filter(
             models.AssetRequest.status.in_(["hr_approved", "assigned_to_assets"])
         ).all()
         
-        return [self._format_request(req) for req in requests]
+        return self._format_requests(requests)
     
-    def get_complaints_for_assets_team(self) -> List[Dict]:
-        """Get complaints for assets team"""
-        complaints = self.db.query(models.AssetComplaint).filter(
+    def get_complaints_for_assets_team(self, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """Get complaints for assets team, newest first, one page at a time"""
+        query = self._complaint_list_query().filter(
             models.AssetComplaint.status.in_(["open", "in_progress"])
-        ).all()
+        )
+        complaints, next_cursor = self._paginate(query, models.AssetComplaint, limit, cursor)
         
-        return [self._format_complaint(complaint) for complaint in complaints]
+        return {"items": [self._format_complaint(complaint) for complaint in complaints], "next_cursor": next_cursor}
     
     def get_employee_assets(self, employee_id: int) -> List[Dict]:
         """Get assets assigned to employee"""
@@ -315,30 +530,89 @@ class AssetManagementService:
         
         return [self._format_asset(asset) for asset in assets]
     
-    def get_employee_requests(self, employee_id: int) -> List[Dict]:
-        """Get asset requests by employee"""
-        requests = self.db.query(models.AssetRequest).filter(
+    def get_employee_requests(self, employee_id: int, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """Get asset requests by employee, newest first, one page at a time"""
+        query = self._request_list_query().filter(
             models.AssetRequest.employee_id == employee_id
-        ).order_by(models.AssetRequest.created_at.desc()).all()
+        )
+        requests, next_cursor = self._paginate(query, models.AssetRequest, limit, cursor)
         
-        return [self._format_request(req) for req in requests]
+        return {"items": self._format_requests(requests), "next_cursor": next_cursor}
     
-    def get_employee_complaints(self, employee_id: int) -> List[Dict]:
-        """Get complaints by employee"""
-        complaints = self.db.query(models.AssetComplaint).filter(
+    def get_employee_complaints(self, employee_id: int, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """Get complaints by employee, newest first, one page at a time"""
+        query = self._complaint_list_query().filter(
             models.AssetComplaint.employee_id == employee_id
-        ).order_by(models.AssetComplaint.created_at.desc()).all()
+        )
+        complaints, next_cursor = self._paginate(query, models.AssetComplaint, limit, cursor)
         
-        return [self._format_complaint(complaint) for complaint in complaints]
+        return {"items": [self._format_complaint(complaint) for complaint in complaints], "next_cursor": next_cursor}
+    
+    def _paginate(self, query, model, limit: int, cursor: Optional[str] = None):
+        """
+        Keyset pagination on (created_at, id) descending.
+        The cursor is "<created_at isoformat>|<id>" of the last row of the previous page.
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        """
+        if cursor:
+            created_at, _, last_id = cursor.rpartition("|")
+            created_at, last_id = datetime.fromisoformat(created_at), int(last_id)
+            query = query.filter(or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < last_id)
+            ))
+        
+        # Fetch one extra row to learn whether another page exists
+        rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, None
+        
+        rows = rows[:limit]
+        return rows, f"{rows[-1].created_at.isoformat()}|{rows[-1].id}"
+    
+    def _request_list_query(self):
+        """Column-only query for request lists: no ORM objects, employee name via LEFT JOIN"""
+        return self.db.query(*_REQUEST_LIST_COLUMNS).outerjoin(
+            models.Employee, models.AssetRequest.employee_id == models.Employee.id
+        )
+    
+    def _complaint_list_query(self):
+        """Column-only query for complaint lists: employee and asset names via LEFT JOINs"""
+        return self.db.query(*_COMPLAINT_LIST_COLUMNS).outerjoin(
+            models.Employee, models.AssetComplaint.employee_id == models.Employee.id
+        ).outerjoin(
+            models.Asset, models.AssetComplaint.asset_id == models.Asset.id
+        )
     
-    def _format_request(self, request: models.AssetRequest) -> Dict:
-        """Format asset request for API response"""
+    def _row_exists(self, model, row_id: int) -> bool:
+        """Cheap EXISTS check used to tell 'not found' from 'wrong status' after a conditional UPDATE"""
+        return self.db.query(exists().where(model.id == row_id)).scalar()
+    
+    def _format_requests(self, requests) -> List[Dict]:
+        """Format rows from _request_list_query, loading their items in one IN query"""
+        requested_assets = {request.id: [] for request in requests}
+        if requested_assets:
+            items = self.db.query(
+                models.AssetRequestItem.request_id,
+                models.AssetRequestItem.asset_type_code,
+                models.AssetRequestItem.quantity
+            ).filter(
+                models.AssetRequestItem.request_id.in_(requested_assets)
+            ).order_by(models.AssetRequestItem.request_id, models.AssetRequestItem.position)
+            
+            for item in items:
+                requested_assets[item.request_id].extend([item.asset_type_code] * item.quantity)
+        
+        return [self._format_request(request, requested_assets[request.id]) for request in requests]
+    
+    def _format_request(self, request, requested_assets: List[str]) -> Dict:
+        """Format an asset request row from _request_list_query for API response"""
         return {
             "id": request.id,
             "employee_id": request.employee_id,
-            "employee_name": f"{request.employee.first_name} {request.employee.last_name}" if request.employee else "Unknown",
+            "employee_name": f"{request.first_name} {request.last_name}" if request.employee_pk is not None else "Unknown",
             "request_type": request.request_type,
-            "requested_assets": request.requested_assets,
+            "requested_assets": requested_assets,
             "reason": request.reason,
             "priority": request.priority,
             "status": request.status,
@@ -348,28 +622,20 @@ class AssetManagementService:
             "assets_team_notes": request.assets_team_notes
         }
     
-    def _format_complaint(self, complaint: models.AssetComplaint) -> Dict:
-        """Format complaint for API response"""
-        # Get employee name safely
-        employee_name = "Unknown"
-        try:
-            if complaint.employee:
-                employee_name = f"{complaint.employee.first_name} {complaint.employee.last_name}"
-            else:
-                # Fallback: query employee separately
-                employee = self.db.query(models.Employee).filter(models.Employee.id == complaint.employee_id).first()
-                if employee:
-                    employee_name = f"{employee.first_name} {employee.last_name}"
-        except Exception:
+    def _format_complaint(self, complaint) -> Dict:
+        """Format a complaint row from _complaint_list_query for API response"""
+        if complaint.employee_pk is not None:
+            employee_name = f"{complaint.first_name} {complaint.last_name}"
+        else:
             employee_name = "Unknown"
-            
+        
         return {
             "id": complaint.id,
-            "ticket_number": f"COMP-{complaint.id:06d}",
+            "ticket_number": models.AssetComplaint.format_ticket_number(complaint.id),
             "employee_id": complaint.employee_id,
             "employee_name": employee_name,
             "asset_id": complaint.asset_id,
-            "asset_name": complaint.asset.name if complaint.asset else None,
+            "asset_name": complaint.asset_name,
             "title": complaint.title,
             "description": complaint.description,
             "complaint_type": complaint.complaint_type,
@@ -392,202 +658,172 @@ class AssetManagementService:
             "specifications": asset.specifications
         }
     
+    def _complaint_employee_name(self, complaint: models.AssetComplaint) -> str:
+        """Employee display name for complaint notifications"""
+        # A missing relationship means there is no employee row, so no fallback query
+        employee = complaint.employee
+        if employee:
+            return f"{employee.first_name} {employee.last_name}"
+        return "Unknown Employee"
+    
     def _notify_manager_for_approval(self, request: models.AssetRequest):
         """Notify manager about pending asset request"""
         # Implementation depends on your notification system
         pass
     
-    def _notify_hr_for_approval(self, request: models.AssetRequest):
+    def _notify_hr_for_approval(self, request):
         """Notify HR about pending asset request"""
         pass
     
-    def _notify_assets_team(self, request: models.AssetRequest):
+    def _notify_assets_team(self, request):
         """Notify assets team about approved request"""
         pass
     
+    def _notify_employee_assets_ready(self, request, assigned_assets: List[Dict]):
+        """Notify employee that requested assets have been assigned"""
+        pass
+    
+    def _queue_notifications(self, rows: List[Dict]):
+        """Queue in-app notification rows to be inserted after the session's next commit"""
+        self.db.info.setdefault(_PENDING_NOTIFICATIONS_KEY, []).extend(rows)
+    
     def _notify_assets_team_complaint(self, complaint: models.AssetComplaint):
         """Notify assets team about new IT complaint with detailed information"""
         try:
-            # Get all assets team members
-            assets_team_users = self.db.query(models.User).filter(
-                models.User.role == "assets_team",
-                models.User.is_active == True
-            ).all()
+            # Get all assets team members (cached ids)
+            assets_team_user_ids = get_active_user_ids_by_roles(self.db, ("assets_team",))
             
             # Get employee information safely
-            employee_name = "Unknown Employee"
-            try:
-                if complaint.employee:
-                    employee_name = f"{complaint.employee.first_name} {complaint.employee.last_name}"
-                else:
-                    # Fallback: query employee separately
-                    employee = self.db.query(models.Employee).filter(models.Employee.id == complaint.employee_id).first()
-                    if employee:
-                        employee_name = f"{employee.first_name} {employee.last_name}"
-            except Exception as e:
-                print(f"Error getting employee name: {e}")
-                employee_name = f"Employee ID: {complaint.employee_id}"
+            employee_name = self._complaint_employee_name(complaint)
             
             # Get asset information safely
             asset_info = "No specific equipment mentioned"
-            try:
-                if complaint.asset:
-                    asset_info = f"Related Equipment: {complaint.asset.name} ({complaint.asset.serial_number})"
-            except Exception as e:
-                print(f"Error getting asset info: {e}")
-                if complaint.asset_id:
-                    asset_info = f"Related Equipment ID: {complaint.asset_id}"
+            if complaint.asset:
+                asset_info = f"Related Equipment: {complaint.asset.name} ({complaint.asset.serial_number})"
             
             # Create detailed complaint message
-            issue_type_map = {
-                'hardware_issue': '💻 Hardware Issue',
-                'software_issue': '🖥️ Software Issue', 
-                'network_issue': '📶 Network Issue',
-                'email_issue': '📧 Email Issue',
-                'performance': '⚡ Performance Issue',
-                'damage': '🔧 Physical Damage',
-                'theft': '🚨 Theft/Loss',
-                'other': '❓ Other IT Issue'
-            }
-            
-            issue_type_display = issue_type_map.get(complaint.complaint_type, complaint.complaint_type)
-            
-            detailed_message = f"""🚨 New IT Issue Reported
-
-Employee: {employee_name}
-Ticket: COMP-{complaint.id:06d}
-Issue: {complaint.title}
-
-Type: {issue_type_display}
-Priority: {complaint.priority.upper()}
-Impact: {complaint.impact_level.upper()}
-
-Description:
-{complaint.description}
-
-{asset_info}
-
-Please investigate and resolve this IT issue promptly."""
+            detailed_message = _COMPLAINT_TEMPLATE.format(
+                employee_name=employee_name,
+                ticket_number=complaint.ticket_number,
+                title=complaint.title,
+                issue_type=_ISSUE_TYPE_MAP.get(complaint.complaint_type, complaint.complaint_type),
+                priority=complaint.priority.upper(),
+                impact_level=complaint.impact_level.upper(),
+                description=complaint.description,
+                asset_info=asset_info
+            )
             
-            for user in assets_team_users:
-                try:
-                    self.notification_service.create_notification(
-                        user_id=user.id,
-                        title=f"🚨 New IT Issue: {complaint.title}",
-                        message=detailed_message,
-                        type="it_complaint",
-                        action_url=f"/assets/complaints/{complaint.id}",
-                        notification_data={
-                            "complaint_id": complaint.id,
-                            "employee_id": complaint.employee_id,
-                            "priority": complaint.priority,
-                            "impact_level": complaint.impact_level,
-                            "complaint_type": complaint.complaint_type
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error creating notification for user {user.id}: {e}")
-                    # Continue with other users even if one fails
-                    continue
-                    
-        except Exception as e:
-            print(f"Error in _notify_assets_team_complaint: {e}")
+            self._queue_notifications([
+                {
+                    "user_id": user_id,
+                    "title": f"🚨 New IT Issue: {complaint.title}",
+                    "message": detailed_message,
+                    "type": "it_complaint",
+                    "action_url": f"/assets/complaints/{complaint.id}",
+                    "notification_data": {
+                        "complaint_id": complaint.id,
+                        "employee_id": complaint.employee_id,
+                        "priority": complaint.priority,
+                        "impact_level": complaint.impact_level,
+                        "complaint_type": complaint.complaint_type
+                    }
+                }
+                for user_id in assets_team_user_ids
+            ])
+        except Exception:
             # Don't let notification errors prevent complaint creation
-            pass
+            logger.exception("Error in _notify_assets_team_complaint")
     
     def _notify_employee_complaint_resolved(self, complaint: models.AssetComplaint):
         """Notify employee that their IT complaint is resolved"""
         try:
-            resolution_message = f"""✅ Your IT Issue Has Been Resolved
-
-Ticket: COMP-{complaint.id:06d}
-Issue: {complaint.title}
-
-Resolution: {complaint.resolution_action.replace('_', ' ').title()}
-Details: {complaint.resolution_notes}
-
-Your IT issue has been resolved by our Assets Team. If you continue to experience problems, please report a new issue."""
+            resolution_message = _EMPLOYEE_RESOLVED_TEMPLATE.format(
+                ticket_number=complaint.ticket_number,
+                title=complaint.title,
+                resolution_action=complaint.resolution_action.replace('_', ' ').title(),
+                resolution_notes=complaint.resolution_notes
+            )
+            
+            # Only the user id is needed, so resolve employee -> user in one id-only join
+            employee_user_id = self.db.query(models.User.id).join(
+                models.Employee, models.Employee.user_id == models.User.id
+            ).filter(models.Employee.id == complaint.employee_id).scalar()
             
-            # Get employee's user ID safely
-            employee_user = None
-            try:
-                if complaint.employee and complaint.employee.user_id:
-                    employee_user = self.db.query(models.User).filter(models.User.id == complaint.employee.user_id).first()
-                else:
-                    # Fallback: query employee separately
-                    employee = self.db.query(models.Employee).filter(models.Employee.id == complaint.employee_id).first()
-                    if employee and employee.user_id:
-                        employee_user = self.db.query(models.User).filter(models.User.id == employee.user_id).first()
-            except Exception as e:
-                print(f"Error getting employee user: {e}")
-                
-            if employee_user:
-                self.notification_service.create_notification(
-                    user_id=employee_user.id,
-                    title="✅ IT Issue Resolved",
-                    message=resolution_message,
-                    type="complaint_resolved",
-                    action_url=f"/assets/complaints/{complaint.id}",
-                    notification_data={
+            if employee_user_id:
+                self._queue_notifications([{
+                    "user_id": employee_user_id,
+                    "title": "✅ IT Issue Resolved",
+                    "message": resolution_message,
+                    "type": "complaint_resolved",
+                    "action_url": f"/assets/complaints/{complaint.id}",
+                    "notification_data": {
                         "complaint_id": complaint.id,
                         "resolution_action": complaint.resolution_action
                     }
-                )
-        except Exception as e:
-            print(f"Error in _notify_employee_complaint_resolved: {e}")
+                }])
+        except Exception:
             # Don't let notification errors prevent resolution
+            logger.exception("Error in _notify_employee_complaint_resolved")
     
     def _notify_managers_complaint_resolved(self, complaint: models.AssetComplaint):
         """Notify managers and admin that an IT complaint has been resolved"""
         try:
-            # Get all manager, HR, and admin users
-            manager_users = self.db.query(models.User).filter(
-                models.User.role.in_(["manager", "hr", "admin"]),
-                models.User.is_active == True
-            ).all()
+            # Get all manager, HR, and admin users (cached ids)
+            manager_user_ids = get_active_user_ids_by_roles(self.db, ("manager", "hr", "admin"))
             
             # Get employee name safely
-            employee_name = "Unknown Employee"
-            try:
-                if complaint.employee:
-                    employee_name = f"{complaint.employee.first_name} {complaint.employee.last_name}"
-                else:
-                    # Fallback: query employee separately
-                    employee = self.db.query(models.Employee).filter(models.Employee.id == complaint.employee_id).first()
-                    if employee:
-                        employee_name = f"{employee.first_name} {employee.last_name}"
-            except Exception as e:
-                print(f"Error getting employee name: {e}")
-                employee_name = f"Employee ID: {complaint.employee_id}"
+            employee_name = self._complaint_employee_name(complaint)
             
-            resolution_message = f"""✅ IT Issue Resolved
+            resolution_message = _MANAGERS_RESOLVED_TEMPLATE.format(
+                employee_name=employee_name,
+                ticket_number=complaint.ticket_number,
+                title=complaint.title,
+                resolution_action=complaint.resolution_action.replace('_', ' ').title()
+            )
+            
+            self._queue_notifications([
+                {
+                    "user_id": user_id,
+                    "title": "✅ IT Issue Resolved",
+                    "message": resolution_message,
+                    "type": "complaint_resolved",
+                    "action_url": f"/assets/complaints/{complaint.id}",
+                    "notification_data": {
+                        "complaint_id": complaint.id,
+                        "employee_id": complaint.employee_id,
+                        "resolution_action": complaint.resolution_action
+                    }
+                }
+                for user_id in manager_user_ids
+            ])
+        except Exception:
+            # Don't let notification errors prevent resolution
+            logger.exception("Error in _notify_managers_complaint_resolved")
 
-Employee: {employee_name}
-Ticket: COMP-{complaint.id:06d}
-Issue: {complaint.title}
 
-Resolution: {complaint.resolution_action.replace('_', ' ').title()}
-Resolved by: Assets Team
+def send_complaint_created_notifications(complaint_id: int):
+    """Background task: notify the assets team about a new complaint using its own session"""
+    db = SessionLocal()
+    try:
+        complaint = db.query(models.AssetComplaint).filter(models.AssetComplaint.id == complaint_id).first()
+        if complaint:
+            AssetManagementService(db)._notify_assets_team_complaint(complaint)
+            # Committing writes the queued notifications
+            db.commit()
+    finally:
+        db.close()
 
-The IT issue has been successfully resolved."""
-            
-            for user in manager_users:
-                try:
-                    self.notification_service.create_notification(
-                        user_id=user.id,
-                        title="✅ IT Issue Resolved",
-                        message=resolution_message,
-                        type="complaint_resolved",
-                        action_url=f"/assets/complaints/{complaint.id}",
-                        notification_data={
-                            "complaint_id": complaint.id,
-                            "employee_id": complaint.employee_id,
-                            "resolution_action": complaint.resolution_action
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error creating notification for manager {user.id}: {e}")
-                    continue
-        except Exception as e:
-            print(f"Error in _notify_managers_complaint_resolved: {e}")
-            # Don't let notification errors prevent resolution
\ No newline at end of file
+
+def send_complaint_resolved_notifications(complaint_id: int):
+    """Background task: notify the employee and managers about a resolution using its own session"""
+    db = SessionLocal()
+    try:
+        complaint = db.query(models.AssetComplaint).filter(models.AssetComplaint.id == complaint_id).first()
+        if complaint:
+            service = AssetManagementService(db)
+            service._notify_employee_complaint_resolved(complaint)
+            service._notify_managers_complaint_resolved(complaint)
+            # Committing writes the queued notifications
+            db.commit()
+    finally:
+        db.close()
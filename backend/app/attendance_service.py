@@ -3,14 +3,18 @@ Simple Attendance Service
 Handles basic attendance marking with face recognition
 """
 
+import asyncio
 from datetime import datetime, time, date, timedelta
-from typing import Dict, Any, Optional, Tuple
-from sqlalchemy.orm import Session
+from typing import Dict, Any, NamedTuple, Optional, Tuple
+from sqlalchemy import and_, event, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload
 from app import models, face_recognition_utils
 from app.notification_service import get_notification_service
 from app.security_service import get_security_service
+from app.role_utils import get_active_user_ids_by_roles
 import math
-import base64
+import numpy as np
 import os
 import logging
 
@@ -18,6 +22,73 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_M = 6371e3
+LOCATION_ANOMALY_DISTANCE_M = 1000
+# Haversine term a = sin²(d / 2R) at the anomaly distance: d > 1km exactly when a exceeds it,
+# so the check needs no sqrt/arcsin
+_LOCATION_ANOMALY_HAV = math.sin(LOCATION_ANOMALY_DISTANCE_M / (2 * EARTH_RADIUS_M)) ** 2
+
+# Check-in windows per shift name
+SHIFT_WINDOWS = {
+    "Morning Shift": {"start": time(8, 0), "end": time(11, 0), "grace": 15},
+    "Evening Shift": {"start": time(13, 0), "end": time(16, 0), "grace": 15},
+    "Night Shift": {"start": time(21, 0), "end": time(23, 59), "grace": 15}
+}
+DEFAULT_SHIFT_WINDOW = {"start": time(9, 0), "end": time(11, 0), "grace": 15}
+
+
+class ShiftWindow(NamedTuple):
+    """A shift window pre-converted to seconds since midnight for integer comparisons"""
+    start: int
+    end: int
+    grace_end: int  # end + grace, wrapped past midnight like a time of day
+    grace: int
+    start_hhmm: str
+    end_hhmm: str
+    end_time: time
+
+def _seconds_since_midnight(t: time) -> float:
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+
+def _build_shift_window(start: time, end: time, grace: int) -> ShiftWindow:
+    end_s = int(_seconds_since_midnight(end))
+    return ShiftWindow(
+        start=int(_seconds_since_midnight(start)),
+        end=end_s,
+        grace_end=(end_s + grace * 60) % 86400,
+        grace=grace,
+        start_hhmm=start.strftime("%H:%M"),
+        end_hhmm=end.strftime("%H:%M"),
+        end_time=end
+    )
+
+# Built once at import; _perform_validation only does integer compares
+_SHIFT_WINDOW_TABLE = {name: _build_shift_window(**config) for name, config in SHIFT_WINDOWS.items()}
+_DEFAULT_SHIFT_WINDOW = _build_shift_window(**DEFAULT_SHIFT_WINDOW)
+
+ATTENDANCE_PHOTO_DIR = "uploads/attendance_photos"
+os.makedirs(ATTENDANCE_PHOTO_DIR, exist_ok=True)
+
+# Fraud indicators kept on an attendance row; bounds the JSONB value
+MAX_STORED_FRAUD_INDICATORS = 5
+
+
+class ShiftRef(NamedTuple):
+    """The shift fields attendance marking needs, safe to share across sessions"""
+    id: int
+    name: str
+
+# Shift name -> ShiftRef, kept for the process and dropped whenever a Shift row changes
+_shift_cache: Dict[str, ShiftRef] = {}
+
+def invalidate_shift_cache(*args):
+    """Drop cached shifts; wired to Shift insert/update/delete events"""
+    _shift_cache.clear()
+
+for _shift_event in ("after_insert", "after_update", "after_delete"):
+    event.listen(models.Shift, _shift_event, invalidate_shift_cache)
+
+
 class AttendanceService:
     
     def __init__(self, db: Session):
@@ -33,13 +104,11 @@ class AttendanceService:
             "address": "Hyderabad, Telangana"
         }
         self.MAX_DISTANCE = 100  # meters
+        # Office-side haversine terms, constant for every GPS check
+        self._office_cos_phi = math.cos(self.OFFICE_COORDS["lat"] * math.pi / 180)
         
         # Time windows for different shifts
-        self.SHIFT_WINDOWS = {
-            "Morning Shift": {"start": time(8, 0), "end": time(11, 0), "grace": 15},
-            "Evening Shift": {"start": time(13, 0), "end": time(16, 0), "grace": 15},
-            "Night Shift": {"start": time(21, 0), "end": time(23, 59), "grace": 15}
-        }
+        self.SHIFT_WINDOWS = SHIFT_WINDOWS
     
     async def mark_attendance_comprehensive(
         self, 
@@ -79,11 +148,14 @@ class AttendanceService:
             # ============================================
             
             verification_result = await self._perform_verification(
-                employee, photo_base64, latitude, longitude, use_face_recognition
+                employee, wfh_request, photo_base64, latitude, longitude, use_face_recognition
             )
             if not verification_result["success"]:
                 return verification_result
             
+            # Decoded once during verification, reused when saving the photo
+            photo_bytes = verification_result.pop("photo_bytes")
+            
             # ============================================
             # STEP 3: VALIDATION
             # ============================================
@@ -102,7 +174,7 @@ class AttendanceService:
                 employee=employee,
                 wfh_request=wfh_request,
                 assigned_shift=assigned_shift,
-                photo_base64=photo_base64,
+                photo_bytes=photo_bytes,
                 latitude=latitude,
                 longitude=longitude,
                 verification_data=verification_result["verification_data"],
@@ -112,8 +184,12 @@ class AttendanceService:
             logger.info(f"Attendance marking completed for employee {employee_id}")
             return attendance_result
             
-        except Exception as e:
-            logger.error(f"Error in comprehensive attendance marking: {e}")
+        except (SQLAlchemyError, ValueError, OSError) as e:
+            # Stack traces only when debugging; anything else is a bug and propagates
+            logger.error(
+                f"Error in comprehensive attendance marking: {e}",
+                exc_info=logger.isEnabledFor(logging.DEBUG)
+            )
             return {
                 "success": False,
                 "error": "system_error",
@@ -134,11 +210,42 @@ class AttendanceService:
         
         logger.info(f"Performing pre-checks for employee {employee_id}")
         
-        # Check 1: Employee exists and is active
-        employee = self.db.query(models.Employee).filter(
+        # Checks 1-3 in one round trip: the employee with its user, plus today's
+        # attendance and approved WFH request (check 3) via LEFT JOINs.
+        # Only the attendance columns reported back are selected; the date(date)
+        # equality matches the ix_attendance_emp_date expression index.
+        today = date.today()
+        row = self.db.query(
+            models.Employee,
+            models.Attendance.id.label("attendance_id"),
+            models.Attendance.check_in,
+            models.Attendance.status,
+            models.Attendance.work_mode,
+            models.WFHRequest
+        ).options(
+            # Only the user columns the checks read; the rest load lazily if touched
+            joinedload(models.Employee.user).load_only(
+                models.User.id, models.User.email, models.User.is_active
+            )
+        ).outerjoin(
+            models.Attendance, and_(
+                models.Attendance.employee_id == models.Employee.id,
+                func.date(models.Attendance.date) == today
+            )
+        ).outerjoin(
+            models.WFHRequest, and_(
+                models.WFHRequest.employee_id == models.Employee.id,
+                models.WFHRequest.request_date == today,
+                models.WFHRequest.status == "approved"
+            )
+        ).filter(
             models.Employee.id == employee_id
         ).first()
         
+        employee = row.Employee if row else None
+        wfh_request = row.WFHRequest if row else None
+        
+        # Check 1: Employee exists and is active
         if not employee:
             return {
                 "success": False,
@@ -156,35 +263,21 @@ class AttendanceService:
             }
         
         # Check 2: Attendance not already marked today
-        today = date.today()
-        existing_attendance = self.db.query(models.Attendance).filter(
-            models.Attendance.employee_id == employee_id,
-            models.Attendance.date >= datetime.combine(today, time.min),
-            models.Attendance.date < datetime.combine(today, time.max)
-        ).first()
-        
-        if existing_attendance:
+        if row.attendance_id is not None:
             return {
                 "success": False,
                 "error": "already_marked",
                 "message": "Attendance already marked for today",
                 "details": {
                     "existing_attendance": {
-                        "id": existing_attendance.id,
-                        "check_in": existing_attendance.check_in.isoformat() if existing_attendance.check_in else None,
-                        "status": existing_attendance.status,
-                        "work_mode": existing_attendance.work_mode
+                        "id": row.attendance_id,
+                        "check_in": row.check_in.isoformat() if row.check_in else None,
+                        "status": row.status,
+                        "work_mode": row.work_mode
                     }
                 }
             }
         
-        # Check 3: WFH approval status
-        wfh_request = self.db.query(models.WFHRequest).filter(
-            models.WFHRequest.employee_id == employee_id,
-            models.WFHRequest.request_date == today,
-            models.WFHRequest.status == "approved"
-        ).first()
-        
         # Check 4: Assigned shift identification
         assigned_shift = self._get_employee_shift(employee)
         
@@ -205,6 +298,7 @@ class AttendanceService:
     async def _perform_verification(
         self, 
         employee: models.Employee, 
+        wfh_request: Optional[models.WFHRequest],
         photo_base64: Optional[str],
         latitude: Optional[float],
         longitude: Optional[float],
@@ -240,11 +334,24 @@ class AttendanceService:
                 "details": {"verification_step": "photo_capture"}
             }
         
+        # Decoding a full webcam photo is CPU-bound; keep it off the event loop
+        try:
+            photo_bytes = await asyncio.to_thread(
+                face_recognition_utils.decode_base64_payload, photo_base64
+            )
+        except (ValueError, TypeError):
+            return {
+                "success": False,
+                "error": "invalid_photo",
+                "message": "Photo could not be decoded",
+                "details": {"verification_step": "photo_capture"}
+            }
+        
         verification_data["photo_captured"] = True
         
         # Verification 2: Face recognition
         if use_face_recognition:
-            face_result = await self._verify_face_recognition(employee, photo_base64)
+            face_result = await self._verify_face_recognition(employee, photo_bytes)
             if not face_result["success"]:
                 return face_result
             
@@ -252,12 +359,7 @@ class AttendanceService:
             verification_data["face_match_confidence"] = face_result["confidence"]
         
         # Verification 3: GPS validation (office mode only)
-        wfh_request = self.db.query(models.WFHRequest).filter(
-            models.WFHRequest.employee_id == employee.id,
-            models.WFHRequest.request_date == date.today(),
-            models.WFHRequest.status == "approved"
-        ).first()
-        
+        # wfh_request is today's approved WFH request, already loaded by the pre-checks
         work_mode = "wfh" if wfh_request else "office"
         
         if work_mode == "office":
@@ -275,7 +377,10 @@ class AttendanceService:
         )
         
         verification_data["security_validation"] = security_validation
-        verification_data["fraud_indicators"] = security_validation.get("warnings", [])
+        verification_data["fraud_indicators"] = [
+            _security_warning_indicator(warning)
+            for warning in security_validation.get("warnings", [])
+        ]
         
         # Block if critical security issues
         if not security_validation["security_passed"]:
@@ -291,26 +396,33 @@ class AttendanceService:
         return {
             "success": True,
             "verification_data": verification_data,
+            "photo_bytes": photo_bytes,
             "details": {
                 "work_mode": work_mode,
                 "face_confidence": verification_data["face_match_confidence"],
                 "location_distance": verification_data["location_distance"],
-                "fraud_score": len(fraud_indicators)
+                "fraud_score": len(verification_data["fraud_indicators"])
             }
         }
     
     async def _verify_face_recognition(
         self, 
         employee: models.Employee, 
-        photo_base64: str
+        photo_bytes: bytes
     ) -> Dict[str, Any]:
         """Verify face recognition with confidence scoring"""
         
         try:
-            # Load profile image
-            profile_image = face_recognition_utils.load_profile_image(employee.id)
+            # Compare against the cached profile face encoding; decoding and
+            # face encoding of the new photo are blocking work
+            result = await asyncio.to_thread(
+                face_recognition_utils.compare_face_to_profile,
+                employee.id,
+                photo_bytes,
+                tolerance=0.6
+            )
             
-            if not profile_image:
+            if result.get("profile_missing"):
                 return {
                     "success": False,
                     "error": "profile_image_missing",
@@ -318,13 +430,6 @@ class AttendanceService:
                     "details": {"employee_id": employee.id}
                 }
             
-            # Compare faces
-            result = face_recognition_utils.compare_faces(
-                profile_image, 
-                photo_base64,
-                tolerance=0.6
-            )
-            
             if not result["match"]:
                 return {
                     "success": False,
@@ -368,10 +473,7 @@ class AttendanceService:
             }
         
         # Calculate distance from office
-        distance = self._haversine_distance(
-            latitude, longitude, 
-            self.OFFICE_COORDS["lat"], self.OFFICE_COORDS["lon"]
-        )
+        distance = self._haversine_to_office(latitude, longitude)
         
         if distance > self.MAX_DISTANCE:
             return {
@@ -397,9 +499,15 @@ class AttendanceService:
         photo_base64: str,
         latitude: Optional[float],
         longitude: Optional[float],
-        verification_data: Dict[str, Any]
+        verification_data: Dict[str, Any],
+        wfh_request: Optional[models.WFHRequest] = None
     ) -> list:
-        """Detect potential fraud indicators"""
+        """
+        Detect potential fraud indicators
+        
+        wfh_request is today's approved WFH request as loaded by the pre-checks;
+        it doubles as the special approval for weekend attendance.
+        """
         
         fraud_indicators = []
         
@@ -411,32 +519,43 @@ class AttendanceService:
                 "details": f"Face confidence {verification_data.get('face_match_confidence', 0)}% below threshold"
             })
         
-        # Check 2: Unusual location pattern
-        recent_attendance = self.db.query(models.Attendance).filter(
+        # Checks 2 and 3 share one query: the newest attendance of the last 7 days.
+        # Only the latest 3 are compared by location, and any attempt within 5 minutes
+        # is necessarily among the newest rows, so 10 rows cover both checks.
+        now = datetime.now()
+        recent_attendance = self.db.query(
+            models.Attendance.date,
+            models.Attendance.latitude,
+            models.Attendance.longitude
+        ).filter(
             models.Attendance.employee_id == employee.id,
-            models.Attendance.date >= datetime.now() - timedelta(days=7)
-        ).all()
+            models.Attendance.date >= now - timedelta(days=7)
+        ).order_by(models.Attendance.date.desc()).limit(10).all()
         
+        # Check 2: Unusual location pattern
         if latitude and longitude and recent_attendance:
-            # Check for significant location changes
-            for att in recent_attendance[-3:]:  # Last 3 records
-                if att.latitude and att.longitude:
-                    distance = self._haversine_distance(
-                        latitude, longitude, att.latitude, att.longitude
-                    )
-                    if distance > 1000:  # More than 1km difference
-                        fraud_indicators.append({
-                            "type": "location_anomaly",
-                            "severity": "low",
-                            "details": f"Location differs by {int(distance)}m from recent attendance"
-                        })
-                        break
+            # Check for significant location changes against the last 3 records with GPS,
+            # oldest first
+            located = [att for att in reversed(recent_attendance[:3]) if att.latitude and att.longitude]
+            if located:
+                hav = self._haversine_terms(
+                    latitude, longitude,
+                    np.fromiter((att.latitude for att in located), dtype=np.float64, count=len(located)),
+                    np.fromiter((att.longitude for att in located), dtype=np.float64, count=len(located))
+                )
+                too_far = hav > _LOCATION_ANOMALY_HAV  # More than 1km difference
+                if too_far.any():
+                    # Only the reported record needs its distance in meters
+                    distance = 2 * EARTH_RADIUS_M * math.asin(math.sqrt(hav[np.argmax(too_far)]))
+                    fraud_indicators.append({
+                        "type": "location_anomaly",
+                        "severity": "low",
+                        "details": f"Location differs by {int(distance)}m from recent attendance"
+                    })
         
         # Check 3: Rapid successive attempts
-        recent_attempts = self.db.query(models.Attendance).filter(
-            models.Attendance.employee_id == employee.id,
-            models.Attendance.date >= datetime.now() - timedelta(minutes=5)
-        ).count()
+        rapid_cutoff = now - timedelta(minutes=5)
+        recent_attempts = sum(1 for att in recent_attendance if att.date >= rapid_cutoff)
         
         if recent_attempts > 0:
             fraud_indicators.append({
@@ -449,13 +568,7 @@ class AttendanceService:
         today = date.today()
         if today.weekday() >= 5:  # Saturday or Sunday
             # Check if there's a special work approval
-            special_approval = self.db.query(models.WFHRequest).filter(
-                models.WFHRequest.employee_id == employee.id,
-                models.WFHRequest.request_date == today,
-                models.WFHRequest.status == "approved"
-            ).first()
-            
-            if not special_approval:
+            if not wfh_request:
                 fraud_indicators.append({
                     "type": "weekend_attendance",
                     "severity": "medium",
@@ -467,7 +580,7 @@ class AttendanceService:
     async def _perform_validation(
         self,
         employee: models.Employee,
-        assigned_shift: Optional[models.Shift],
+        assigned_shift: Optional[ShiftRef],
         wfh_request: Optional[models.WFHRequest],
         latitude: Optional[float],
         longitude: Optional[float]
@@ -495,49 +608,42 @@ class AttendanceService:
         
         # Validation 1: Time window check
         current_time = datetime.now().time()
+        now = _seconds_since_midnight(current_time)
         
         if assigned_shift:
-            shift_config = self.SHIFT_WINDOWS.get(assigned_shift.name, {
-                "start": time(9, 0), "end": time(11, 0), "grace": 15
-            })
+            window = _SHIFT_WINDOW_TABLE.get(assigned_shift.name, _DEFAULT_SHIFT_WINDOW)
             
             validation_data["shift_window"] = {
-                "start": shift_config["start"].strftime("%H:%M"),
-                "end": shift_config["end"].strftime("%H:%M"),
-                "grace_minutes": shift_config["grace"]
+                "start": window.start_hhmm,
+                "end": window.end_hhmm,
+                "grace_minutes": window.grace
             }
             
             # Check if within main window
-            if shift_config["start"] <= current_time <= shift_config["end"]:
+            if window.start <= now <= window.end:
                 validation_data["within_time_window"] = True
             else:
                 # Check grace period
-                grace_end = (datetime.combine(date.today(), shift_config["end"]) + 
-                           timedelta(minutes=shift_config["grace"])).time()
-                
-                if current_time <= grace_end:
+                if now <= window.grace_end:
                     validation_data["within_time_window"] = True
                     validation_data["late_minutes"] = self._calculate_late_minutes(
-                        current_time, shift_config["end"]
+                        current_time, window.end_time
                     )
                 else:
                     validation_data["requires_approval"] = True
                     validation_data["attendance_status"] = "late"
                     validation_data["late_minutes"] = self._calculate_late_minutes(
-                        current_time, shift_config["end"]
+                        current_time, window.end_time
                     )
         else:
             # Default time window (9 AM - 11 AM)
-            default_start = time(9, 0)
-            default_end = time(11, 0)
-            
-            if default_start <= current_time <= default_end:
+            if _DEFAULT_SHIFT_WINDOW.start <= now <= _DEFAULT_SHIFT_WINDOW.end:
                 validation_data["within_time_window"] = True
             else:
                 validation_data["requires_approval"] = True
                 validation_data["attendance_status"] = "late"
                 validation_data["late_minutes"] = self._calculate_late_minutes(
-                    current_time, default_end
+                    current_time, _DEFAULT_SHIFT_WINDOW.end_time
                 )
         
         # Validation 2: Work mode validation
@@ -566,8 +672,8 @@ class AttendanceService:
         self,
         employee: models.Employee,
         wfh_request: Optional[models.WFHRequest],
-        assigned_shift: Optional[models.Shift],
-        photo_base64: Optional[str],
+        assigned_shift: Optional[ShiftRef],
+        photo_bytes: Optional[bytes],
         latitude: Optional[float],
         longitude: Optional[float],
         verification_data: Dict[str, Any],
@@ -580,8 +686,8 @@ class AttendanceService:
         try:
             # Save photo
             photo_url = None
-            if photo_base64:
-                photo_url = self._save_attendance_photo(photo_base64, employee.id)
+            if photo_bytes:
+                photo_url = await self._save_attendance_photo(photo_bytes, employee.id)
             
             # Determine location address
             if validation_data["work_mode"] == "wfh":
@@ -589,6 +695,8 @@ class AttendanceService:
             else:
                 location_address = self.OFFICE_COORDS["address"]
             
+            stored_indicators = verification_data["fraud_indicators"][:MAX_STORED_FRAUD_INDICATORS]
+            
             # Create attendance record
             attendance = models.Attendance(
                 employee_id=employee.id,
@@ -607,12 +715,22 @@ class AttendanceService:
                 approval_status="auto_approved" if not validation_data["requires_approval"] else "pending",
                 shift_id=assigned_shift.id if assigned_shift else None,
                 face_match_confidence=verification_data.get("face_match_confidence"),
-                flagged_reason="; ".join([f["details"] for f in verification_data["fraud_indicators"]]) if verification_data["fraud_indicators"] else None
+                fraud_indicators=stored_indicators or None,
+                flagged_reason="; ".join(f["details"] for f in stored_indicators) or None
             )
             
             self.db.add(attendance)
-            self.db.commit()
-            self.db.refresh(attendance)
+            self.db.flush()  # Assigns attendance.id (INSERT ... RETURNING)
+            
+            # Every column read below was set here or by the flush, so keep the
+            # loaded state on commit instead of re-selecting the row. Scoped to
+            # this commit since the session is shared with the caller.
+            expire_on_commit = self.db.expire_on_commit
+            self.db.expire_on_commit = False
+            try:
+                self.db.commit()
+            finally:
+                self.db.expire_on_commit = expire_on_commit
             
             # Send notifications if required
             if validation_data["requires_approval"]:
@@ -620,7 +738,7 @@ class AttendanceService:
             
             # Send fraud alert if indicators detected
             if verification_data["fraud_indicators"]:
-                await self._send_fraud_alert(attendance, verification_data["fraud_indicators"])
+                await self._send_fraud_alert(attendance, employee, verification_data["fraud_indicators"])
             
             logger.info(f"Attendance record created successfully for employee {employee.id}")
             
@@ -656,13 +774,19 @@ class AttendanceService:
     # HELPER METHODS
     # ============================================
     
-    def _get_employee_shift(self, employee: models.Employee) -> Optional[models.Shift]:
+    def _get_employee_shift(self, employee: models.Employee) -> Optional[ShiftRef]:
         """Get employee's assigned shift (default to Morning Shift)"""
         # In a real system, this would check employee's assigned shift
         # For now, return Morning Shift as default
-        return self.db.query(models.Shift).filter(
-            models.Shift.name == "Morning Shift"
-        ).first()
+        shift_name = "Morning Shift"
+        shift = _shift_cache.get(shift_name)
+        if shift is None:
+            row = self.db.query(models.Shift.id, models.Shift.name).filter(
+                models.Shift.name == shift_name
+            ).first()
+            if row:
+                shift = _shift_cache[shift_name] = ShiftRef(row.id, row.name)
+        return shift
     
     def _haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two GPS coordinates in meters"""
@@ -679,59 +803,78 @@ class AttendanceService:
         
         return R * c
     
-    def _calculate_late_minutes(self, current_time: time, expected_time: time) -> int:
-        """Calculate how many minutes late the employee is"""
-        current_dt = datetime.combine(date.today(), current_time)
-        expected_dt = datetime.combine(date.today(), expected_time)
+    def _haversine_to_office(self, lat: float, lon: float) -> float:
+        """_haversine_distance to the office, using the precomputed office terms"""
+        delta_phi = (self.OFFICE_COORDS["lat"] - lat) * math.pi / 180
+        delta_lambda = (self.OFFICE_COORDS["lon"] - lon) * math.pi / 180
+        
+        a = math.sin(delta_phi/2) * math.sin(delta_phi/2) + \
+            math.cos(lat * math.pi / 180) * self._office_cos_phi * \
+            math.sin(delta_lambda/2) * math.sin(delta_lambda/2)
+        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+        
+        return EARTH_RADIUS_M * c
+    
+    def _haversine_terms(self, lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Haversine term a = sin²(d / 2R) from one point to arrays of points.
+        Monotonic in distance, so compare it against a precomputed threshold
+        instead of converting to meters.
+        """
+        phi1 = math.radians(lat)
+        phi2 = np.radians(lats)
+        delta_phi = phi2 - phi1
+        delta_lambda = np.radians(lons - lon)
         
-        if current_dt > expected_dt:
-            return int((current_dt - expected_dt).total_seconds() / 60)
-        return 0
+        return np.sin(delta_phi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    
+    def _calculate_late_minutes(self, current_time: time, expected_time: time) -> int:
+        """Calculate how many minutes late the employee is (expected_time is on a whole minute)"""
+        return max(0, (current_time.hour - expected_time.hour) * 60 + (current_time.minute - expected_time.minute))
     
-    def _save_attendance_photo(self, photo_base64: str, employee_id: int) -> Optional[str]:
-        """Save base64 photo to file system"""
+    async def _save_attendance_photo(self, photo_data: bytes, employee_id: int) -> Optional[str]:
+        """Save decoded photo bytes to file system"""
         try:
-            upload_dir = "uploads/attendance_photos"
-            os.makedirs(upload_dir, exist_ok=True)
-            
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"emp_{employee_id}_{timestamp}.jpg"
-            filepath = os.path.join(upload_dir, filename)
+            filepath = os.path.join(ATTENDANCE_PHOTO_DIR, filename)
             
-            photo_data = base64.b64decode(
-                photo_base64.split(',')[1] if ',' in photo_base64 else photo_base64
-            )
-            with open(filepath, 'wb') as f:
-                f.write(photo_data)
+            # Write from a worker thread so the event loop isn't blocked on disk I/O
+            await asyncio.to_thread(_write_file, filepath, photo_data)
             
             return filepath
         except Exception as e:
             logger.error(f"Error saving photo for employee {employee_id}: {e}")
             return None
     
-    async def _send_fraud_alert(self, attendance: models.Attendance, fraud_indicators: list):
-        """Send fraud alert to HR/Admin"""
+    async def _send_fraud_alert(
+        self,
+        attendance: models.Attendance,
+        employee: models.Employee,
+        fraud_indicators: list
+    ):
+        """Send fraud alert to HR/Admin; employee is passed in to avoid lazy-loading attendance.employee"""
         
-        # Get HR and Admin users
-        hr_users = self.db.query(models.User).filter(
-            models.User.role.in_(['hr', 'admin']),
-            models.User.is_active == True
-        ).all()
+        # Get HR and Admin user ids (cached; emails are resolved by the bulk send)
+        hr_user_ids = get_active_user_ids_by_roles(self.db, ("hr", "admin"))
         
-        employee = attendance.employee
+        if not hr_user_ids:
+            return
         
-        for hr_user in hr_users:
-            subject = f"🚨 Fraud Alert - {employee.first_name} {employee.last_name}"
-            
-            indicators_text = "\n".join([
-                f"• {indicator['type'].replace('_', ' ').title()}: {indicator['details']}"
-                for indicator in fraud_indicators
-            ])
-            
-            message = f"""
+        employee_name = f"{employee.first_name} {employee.last_name}"
+        
+        # The alert is the same for every recipient, so build it once
+        subject = f"🚨 Fraud Alert - {employee_name}"
+        
+        indicators_text = "\n".join([
+            f"• {indicator['type'].replace('_', ' ').title()}: {indicator['details']}"
+            for indicator in fraud_indicators
+        ])
+        
+        message = f"""
 FRAUD ALERT: Suspicious attendance activity detected
 
-Employee: {employee.first_name} {employee.last_name}
+Employee: {employee_name}
 Department: {employee.department or 'N/A'}
 Date: {attendance.date.strftime('%B %d, %Y at %I:%M %p')}
 Work Mode: {attendance.work_mode.upper()}
@@ -743,28 +886,40 @@ Please review this attendance record immediately:
 https://yourapp.com/dashboard/attendance
 
 Attendance ID: {attendance.id}
-            """.strip()
-            
-            await self.notification_service.send_email(
-                to_email=hr_user.email,
-                subject=subject,
-                body=message
-            )
-            
-            # Create urgent in-app notification
-            await self.notification_service.create_in_app_notification(
-                user_id=hr_user.id,
-                title="🚨 Fraud Alert",
-                message=f"Suspicious attendance from {employee.first_name} {employee.last_name}",
-                type="error",
-                action_url="/dashboard/attendance",
-                notification_data={
-                    "attendance_id": attendance.id,
-                    "employee_name": f"{employee.first_name} {employee.last_name}",
-                    "fraud_indicators": fraud_indicators,
-                    "severity": "high"
-                }
-            )
+        """.strip()
+        
+        # All emails over one SMTP session
+        await self.notification_service.send_bulk_notification(
+            user_ids=hr_user_ids,
+            subject=subject,
+            message=message
+        )
+        
+        # Urgent in-app notifications in one INSERT; every row shares one payload
+        in_app_notification = {
+            "title": "🚨 Fraud Alert",
+            "message": f"Suspicious attendance from {employee_name}",
+            "type": "error",
+            "action_url": "/dashboard/attendance",
+            "notification_data": {
+                "attendance_id": attendance.id,
+                "employee_name": employee_name,
+                "fraud_indicators": fraud_indicators,
+                "severity": "high"
+            }
+        }
+        self.notification_service.create_notifications_bulk([
+            {"user_id": user_id, **in_app_notification}
+            for user_id in hr_user_ids
+        ])
+
+def _write_file(filepath: str, data: bytes):
+    with open(filepath, 'wb') as f:
+        f.write(data)
+
+def _security_warning_indicator(warning: str) -> Dict[str, str]:
+    """Wrap a security service warning in the fraud indicator shape (type/severity/details)"""
+    return {"type": "security_warning", "severity": "low", "details": warning}
 
 # ============================================
 # SERVICE FACTORY
@@ -2,10 +2,17 @@
 Background Tasks for Notifications and Periodic Jobs
 """
 import asyncio
+import html
 from datetime import datetime, timedelta
+from functools import partial
+from typing import Awaitable, Callable, List, NamedTuple, Optional
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import SessionLocal, engine
 from app.notification_service import get_notification_service
+from app.role_utils import get_active_user_ids_by_roles
 from app import models
 import logging
 
@@ -13,66 +20,174 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _seconds_until(
+    hour: int,
+    minute: int = 0,
+    weekday: Optional[int] = None,
+    skip_within: float = 0
+) -> float:
+    """Seconds until the next local hour:minute, optionally on a given weekday (Monday=0)
+    
+    An occurrence at most skip_within seconds away is treated as already run.
+    The dispatcher sleeps on the monotonic clock, which can drift from wall
+    time (NTP slewing), so a job may finish slightly before its own slot and
+    must not be rescheduled into it again.
+    """
+    now = datetime.now()
+    next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if weekday is not None:
+        next_run += timedelta(days=(weekday - now.weekday()) % 7)
+    if (next_run - now).total_seconds() <= skip_within:
+        next_run += timedelta(days=1 if weekday is None else 7)
+    return (next_run - now).total_seconds()
+
+async def _delete_in_chunks(db: Session, model, condition, chunk_size: int = 5000) -> int:
+    """Delete rows matching condition chunk_size at a time, committing after each chunk
+    
+    Keeps each DELETE's locks short on large tables; every chunk runs in a
+    worker thread so the event loop is free in between. Returns the number
+    of rows deleted.
+    """
+    deleted = 0
+    while True:
+        count = await asyncio.to_thread(_delete_chunk, db, model, condition, chunk_size)
+        deleted += count
+        if count < chunk_size:
+            return deleted
+
+def _delete_chunk(db: Session, model, condition, chunk_size: int) -> int:
+    chunk_ids = select(model.id).where(condition).limit(chunk_size).scalar_subquery()
+    count = db.query(model).filter(model.id.in_(chunk_ids)).delete(synchronize_session=False)
+    db.commit()
+    return count
+
+# Advisory lock held by the one worker process that runs the periodic jobs
+LEADER_LOCK_KEY = 482001
+
+class PeriodicJob(NamedTuple):
+    name: str
+    run: Callable[[], Awaitable[None]]
+    first_delay: Callable[[], float]  # Seconds from start until the first run
+    next_delay: Callable[[], float]  # Seconds from the end of a run until the next one
+    retry_delay: Optional[float] = None  # After a failed run; defaults to next_delay
+
 class BackgroundTaskManager:
     def __init__(self):
         self.running = False
+        self._stop_event: Optional[asyncio.Event] = None
+        self._leader_conn: Optional[Connection] = None
+    
+    def _is_leader(self) -> bool:
+        """Whether this process runs the periodic jobs
+        
+        Every web worker starts its own dispatcher. On PostgreSQL the first one
+        to take the session-level advisory lock LEADER_LOCK_KEY keeps it on a
+        dedicated connection and runs all jobs; the others skip their runs and
+        take over if that connection (and so the lock) goes away. Other
+        databases always run the jobs.
+        """
+        if engine.dialect.name != "postgresql":
+            return True
+        try:
+            if self._leader_conn is not None:
+                self._leader_conn.execute(text("SELECT 1"))
+                self._leader_conn.commit()
+                return True
+            conn = engine.connect()
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": LEADER_LOCK_KEY}
+            ).scalar()
+            conn.commit()
+            if acquired:
+                self._leader_conn = conn
+            else:
+                conn.close()
+            return bool(acquired)
+        except SQLAlchemyError as e:
+            # A dropped connection took the lock with it; try again next run
+            logger.error(f"Background job leader check failed: {e}")
+            self._release_leadership()
+            return False
+    
+    def _release_leadership(self):
+        if self._leader_conn is not None:
+            try:
+                self._leader_conn.close()
+            except SQLAlchemyError:
+                pass
+            self._leader_conn = None
+    
+    def _jobs(self) -> List[PeriodicJob]:
+        return [
+            PeriodicJob(
+                "daily application summary", self.daily_application_summary,
+                partial(_seconds_until, 9), partial(_seconds_until, 9, skip_within=3600)
+            ),
+            PeriodicJob(
+                "weekly recruitment report", self.weekly_recruitment_report,
+                partial(_seconds_until, 10, weekday=0), partial(_seconds_until, 10, weekday=0, skip_within=3600)
+            ),
+            # Interval jobs run once at startup, then every 24h / 6h (1h after a failure)
+            PeriodicJob("notification cleanup", self.cleanup_old_notifications, lambda: 0, lambda: 86400, 3600),
+            PeriodicJob("stale applications check", self.check_stale_applications, lambda: 0, lambda: 21600, 3600),
+        ]
     
     async def start_periodic_tasks(self):
-        """Start all periodic background tasks"""
+        """Run all periodic background tasks from a single dispatcher until stopped
+        
+        The dispatcher keeps each job's next due time on the monotonic loop
+        clock and sleeps until the earliest one, so there is one timer instead
+        of a polling loop per job.
+        """
         self.running = True
+        self._stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
         
-        # Start different periodic tasks
-        tasks = [
-            self.daily_application_summary(),
-            self.weekly_recruitment_report(),
-            self.cleanup_old_notifications(),
-            self.check_stale_applications()
-        ]
+        start = loop.time()
+        due = {job: start + job.first_delay() for job in self._jobs()}
         
-        await asyncio.gather(*tasks)
+        while self.running:
+            job = min(due, key=due.get)
+            try:
+                # Wakes early only when stop_periodic_tasks is called
+                await asyncio.wait_for(self._stop_event.wait(), max(0, due[job] - loop.time()))
+                break
+            except asyncio.TimeoutError:
+                pass
+            
+            try:
+                if await asyncio.to_thread(self._is_leader):
+                    await job.run()
+                else:
+                    logger.info(f"Skipping {job.name}: another worker runs the periodic jobs")
+                delay = job.next_delay()
+            except Exception as e:
+                logger.error(f"Error in {job.name}: {e}")
+                delay = job.retry_delay if job.retry_delay is not None else job.next_delay()
+            due[job] = loop.time() + delay
     
     async def stop_periodic_tasks(self):
         """Stop all periodic tasks"""
         self.running = False
+        if self._stop_event:
+            self._stop_event.set()
+        # Closing the connection releases the advisory lock for another worker
+        await asyncio.to_thread(self._release_leadership)
     
     async def daily_application_summary(self):
-        """Send daily application summary to HR at 9 AM"""
-        while self.running:
-            try:
-                now = datetime.now()
-                # Check if it's 9 AM
-                if now.hour == 9 and now.minute == 0:
-                    db = SessionLocal()
-                    try:
-                        notification_service = get_notification_service(db)
-                        await notification_service.send_bulk_application_alerts()
-                        logger.info("Daily application summary sent")
-                    finally:
-                        db.close()
-                
-                # Wait 1 minute before checking again
-                await asyncio.sleep(60)
-                
-            except Exception as e:
-                logger.error(f"Error in daily application summary: {e}")
-                await asyncio.sleep(300)  # Wait 5 minutes on error
+        """Send daily application summary to HR (scheduled for 9 AM)"""
+        db = SessionLocal()
+        try:
+            notification_service = get_notification_service(db)
+            await notification_service.send_bulk_application_alerts()
+            logger.info("Daily application summary sent")
+        finally:
+            db.close()
     
     async def weekly_recruitment_report(self):
-        """Send weekly recruitment metrics every Monday at 10 AM"""
-        while self.running:
-            try:
-                now = datetime.now()
-                # Check if it's Monday 10 AM
-                if now.weekday() == 0 and now.hour == 10 and now.minute == 0:
-                    await self.send_weekly_report()
-                    logger.info("Weekly recruitment report sent")
-                
-                # Wait 1 hour before checking again
-                await asyncio.sleep(3600)
-                
-            except Exception as e:
-                logger.error(f"Error in weekly recruitment report: {e}")
-                await asyncio.sleep(3600)
+        """Send weekly recruitment metrics (scheduled for Mondays at 10 AM)"""
+        await self.send_weekly_report()
+        logger.info("Weekly recruitment report sent")
     
     async def send_weekly_report(self):
         """Generate and send weekly recruitment report"""
@@ -81,191 +196,191 @@ class BackgroundTaskManager:
             # Get metrics for the past week
             week_ago = datetime.utcnow() - timedelta(days=7)
             
-            # Applications this week
-            weekly_applications = db.query(models.Application).filter(
-                models.Application.applied_date >= week_ago
-            ).all()
-            
-            # Group by job
-            job_stats = {}
-            for app in weekly_applications:
-                job_title = app.job.title if app.job else "Unknown"
-                if job_title not in job_stats:
-                    job_stats[job_title] = {
-                        "applications": 0,
-                        "avg_score": 0,
-                        "scores": []
-                    }
-                job_stats[job_title]["applications"] += 1
-                if app.ai_fit_score:
-                    job_stats[job_title]["scores"].append(app.ai_fit_score)
-            
-            # Calculate averages
-            for job_title in job_stats:
-                scores = job_stats[job_title]["scores"]
-                if scores:
-                    job_stats[job_title]["avg_score"] = round(sum(scores) / len(scores), 1)
-            
-            # Get HR users
-            hr_users = db.query(models.User).filter(
-                models.User.role.in_(['hr', 'admin']),
-                models.User.is_active == True
-            ).all()
+            job_stats, total_applications, hr_user_ids = await asyncio.to_thread(
+                self._weekly_report_data, db, week_ago
+            )
             
             notification_service = get_notification_service(db)
             
-            for hr_user in hr_users:
-                subject = f"📊 Weekly Recruitment Report - {len(weekly_applications)} Applications"
+            # The report is the same for every recipient, so build it once
+            week_range = f"Week of {week_ago.strftime('%B %d')} - {datetime.now().strftime('%B %d, %Y')}"
+            subject = f"📊 Weekly Recruitment Report - {total_applications} Applications"
+            
+            html_message = f"""
+            <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+                <div style="background: linear-gradient(135deg, #6f42c1 0%, #e83e8c 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0;">
+                    <h2 style="margin: 0;">📊 Weekly Recruitment Report</h2>
+                    <p style="margin: 10px 0 0 0; opacity: 0.9;">{week_range}</p>
+                </div>
                 
-                html_message = f"""
-                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                    <div style="background: linear-gradient(135deg, #6f42c1 0%, #e83e8c 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0;">
-                        <h2 style="margin: 0;">📊 Weekly Recruitment Report</h2>
-                        <p style="margin: 10px 0 0 0; opacity: 0.9;">Week of {week_ago.strftime('%B %d')} - {datetime.now().strftime('%B %d, %Y')}</p>
-                    </div>
-                    
-                    <div style="background: #f8f9fa; padding: 20px; border-radius: 0 0 8px 8px;">
-                        <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 15px;">
-                            <h3 style="color: #333; margin-top: 0;">📈 Weekly Summary</h3>
-                            <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px;">
-                                <div style="text-align: center; padding: 15px; background: #e3f2fd; border-radius: 8px;">
-                                    <div style="font-size: 24px; font-weight: bold; color: #1976d2;">{len(weekly_applications)}</div>
-                                    <div style="color: #666;">Total Applications</div>
-                                </div>
-                                <div style="text-align: center; padding: 15px; background: #e8f5e8; border-radius: 8px;">
-                                    <div style="font-size: 24px; font-weight: bold; color: #388e3c;">{len(job_stats)}</div>
-                                    <div style="color: #666;">Active Positions</div>
-                                </div>
+                <div style="background: #f8f9fa; padding: 20px; border-radius: 0 0 8px 8px;">
+                    <div style="background: white; padding: 20px; border-radius: 8px; margin-bottom: 15px;">
+                        <h3 style="color: #333; margin-top: 0;">📈 Weekly Summary</h3>
+                        <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 15px;">
+                            <div style="text-align: center; padding: 15px; background: #e3f2fd; border-radius: 8px;">
+                                <div style="font-size: 24px; font-weight: bold; color: #1976d2;">{total_applications}</div>
+                                <div style="color: #666;">Total Applications</div>
                             </div>
-                        </div>
-                        
-                        <div style="background: white; padding: 20px; border-radius: 8px;">
-                            <h3 style="color: #333; margin-top: 0;">🎯 Applications by Position</h3>
-                """
-                
-                for job_title, stats in job_stats.items():
-                    html_message += f"""
-                            <div style="border-left: 4px solid #007bff; padding-left: 15px; margin: 15px 0;">
-                                <h4 style="color: #007bff; margin: 0 0 5px 0;">{job_title}</h4>
-                                <p style="margin: 0; color: #666;">{stats['applications']} applications • Avg Score: {stats['avg_score']}%</p>
+                            <div style="text-align: center; padding: 15px; background: #e8f5e8; border-radius: 8px;">
+                                <div style="font-size: 24px; font-weight: bold; color: #388e3c;">{len(job_stats)}</div>
+                                <div style="color: #666;">Active Positions</div>
                             </div>
-                    """
-                
-                html_message += f"""
                         </div>
                     </div>
+                    
+                    <div style="background: white; padding: 20px; border-radius: 8px;">
+                        <h3 style="color: #333; margin-top: 0;">🎯 Applications by Position</h3>
+            """
+            
+            html_message += "".join(f"""
+                        <div style="border-left: 4px solid #007bff; padding-left: 15px; margin: 15px 0;">
+                            <h4 style="color: #007bff; margin: 0 0 5px 0;">{html.escape(job_title)}</h4>
+                            <p style="margin: 0; color: #666;">{stats['applications']} applications • Avg Score: {stats['avg_score']}%</p>
+                        </div>
+                """ for job_title, stats in job_stats.items())
+            
+            html_message += f"""
+                    </div>
                 </div>
-                """
-                
-                plain_message = f"""
+            </div>
+            """
+            
+            plain_message = f"""
 Weekly Recruitment Report
-Week of {week_ago.strftime('%B %d')} - {datetime.now().strftime('%B %d, %Y')}
+{week_range}
 
 Summary:
-- Total Applications: {len(weekly_applications)}
+- Total Applications: {total_applications}
 - Active Positions: {len(job_stats)}
 
 Applications by Position:
 """
-                
-                for job_title, stats in job_stats.items():
-                    plain_message += f"• {job_title}: {stats['applications']} applications (Avg Score: {stats['avg_score']}%)\n"
-                
-                plain_message += f"\nView detailed analytics: https://yourapp.com/analysis-enhanced"
-                
-                await notification_service.send_email(
-                    to_email=hr_user.email,
-                    subject=subject,
-                    body=plain_message,
-                    html_body=html_message
-                )
+            
+            plain_message += "".join(
+                f"• {job_title}: {stats['applications']} applications (Avg Score: {stats['avg_score']}%)\n"
+                for job_title, stats in job_stats.items()
+            )
+            
+            plain_message += f"\nView detailed analytics: https://yourapp.com/analysis-enhanced"
+            
+            # One SMTP session for all recipients, sent off the event loop
+            await notification_service.send_bulk_notification(
+                hr_user_ids,
+                subject,
+                plain_message,
+                html_message=html_message
+            )
                 
         finally:
             db.close()
     
+    def _weekly_report_data(self, db: Session, week_ago: datetime):
+        """Per-position stats, total applications and HR recipients for the weekly report"""
+        # Applications this week, grouped by job title in SQL; unscored
+        # applications (NULL or 0) are left out of the average
+        weekly_job_rows = db.query(
+            models.Job.title,
+            func.count(models.Application.id).label("applications"),
+            func.avg(func.nullif(models.Application.ai_fit_score, 0)).label("avg_score")
+        ).select_from(models.Application).outerjoin(
+            models.Job, models.Application.job_id == models.Job.id
+        ).filter(
+            models.Application.applied_date >= week_ago
+        ).group_by(models.Job.title).order_by(
+            func.count(models.Application.id).desc()
+        ).all()
+        
+        job_stats = {
+            (row.title if row.title is not None else "Unknown"): {
+                "applications": row.applications,
+                "avg_score": round(row.avg_score, 1) if row.avg_score is not None else 0
+            }
+            for row in weekly_job_rows
+        }
+        total_applications = sum(row.applications for row in weekly_job_rows)
+        
+        # Get HR users (cached; shared with the other HR fan-outs)
+        hr_user_ids = get_active_user_ids_by_roles(db, ("hr", "admin"))
+        
+        return job_stats, total_applications, hr_user_ids
+    
     async def cleanup_old_notifications(self):
-        """Clean up old notifications (older than 30 days)"""
-        while self.running:
-            try:
-                db = SessionLocal()
-                try:
-                    # Delete notifications older than 30 days
-                    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-                    
-                    deleted_count = db.query(models.InAppNotification).filter(
-                        models.InAppNotification.created_at < thirty_days_ago
-                    ).delete()
-                    
-                    # Delete old notification logs (older than 90 days)
-                    ninety_days_ago = datetime.utcnow() - timedelta(days=90)
-                    
-                    deleted_logs = db.query(models.NotificationLog).filter(
-                        models.NotificationLog.sent_at < ninety_days_ago
-                    ).delete()
-                    
-                    db.commit()
-                    
-                    if deleted_count > 0 or deleted_logs > 0:
-                        logger.info(f"Cleaned up {deleted_count} old notifications and {deleted_logs} old logs")
-                        
-                finally:
-                    db.close()
-                
-                # Run cleanup once per day
-                await asyncio.sleep(86400)  # 24 hours
+        """Clean up old notifications (older than 30 days) and logs (older than 90 days)"""
+        db = SessionLocal()
+        try:
+            # Delete notifications older than 30 days
+            now = datetime.utcnow()
+            thirty_days_ago = now - timedelta(days=30)
+            
+            deleted_count = await _delete_in_chunks(
+                db, models.InAppNotification, models.InAppNotification.created_at < thirty_days_ago
+            )
+            
+            # Delete old notification logs (older than 90 days)
+            ninety_days_ago = now - timedelta(days=90)
+            
+            deleted_logs = await _delete_in_chunks(
+                db, models.NotificationLog, models.NotificationLog.sent_at < ninety_days_ago
+            )
+            
+            if deleted_count > 0 or deleted_logs > 0:
+                logger.info(f"Cleaned up {deleted_count} old notifications and {deleted_logs} old logs")
                 
-            except Exception as e:
-                logger.error(f"Error in notification cleanup: {e}")
-                await asyncio.sleep(3600)  # Wait 1 hour on error
+        finally:
+            db.close()
     
     async def check_stale_applications(self):
         """Check for applications that haven't been updated in a while"""
-        while self.running:
-            try:
-                db = SessionLocal()
-                try:
-                    # Check for applications in 'applied' status for more than 3 days
-                    three_days_ago = datetime.utcnow() - timedelta(days=3)
-                    
-                    stale_applications = db.query(models.Application).filter(
-                        models.Application.status == 'applied',
-                        models.Application.applied_date <= three_days_ago
-                    ).all()
-                    
-                    if stale_applications:
-                        # Notify HR about stale applications
-                        hr_users = db.query(models.User).filter(
-                            models.User.role.in_(['hr', 'admin']),
-                            models.User.is_active == True
-                        ).all()
-                        
-                        notification_service = get_notification_service(db)
-                        
-                        for hr_user in hr_users:
-                            # Create in-app notification
-                            await notification_service.create_in_app_notification(
-                                user_id=hr_user.id,
-                                title="Stale Applications Alert",
-                                message=f"{len(stale_applications)} applications have been pending review for 3+ days",
-                                type="warning",
-                                action_url="/recruitment",
-                                notification_data={
-                                    "stale_count": len(stale_applications),
-                                    "applications": [app.id for app in stale_applications[:5]]  # First 5 IDs
-                                }
-                            )
-                        
-                        logger.info(f"Notified HR about {len(stale_applications)} stale applications")
-                        
-                finally:
-                    db.close()
+        stale_count = await asyncio.to_thread(self._notify_stale_applications)
+        if stale_count:
+            logger.info(f"Notified HR about {stale_count} stale applications")
+    
+    def _notify_stale_applications(self) -> int:
+        """Alert HR about applications pending review for 3+ days; returns how many there are"""
+        db = SessionLocal()
+        try:
+            # Check for applications in 'applied' status for more than 3 days
+            three_days_ago = datetime.utcnow() - timedelta(days=3)
+            
+            stale_filter = (
+                models.Application.status == 'applied',
+                models.Application.applied_date <= three_days_ago
+            )
+            stale_count = db.query(func.count(models.Application.id)).filter(*stale_filter).scalar()
+            
+            if stale_count:
+                # Notify HR about stale applications
+                hr_user_ids = get_active_user_ids_by_roles(db, ("hr", "admin"))
                 
-                # Check every 6 hours
-                await asyncio.sleep(21600)
+                notification_service = get_notification_service(db)
                 
-            except Exception as e:
-                logger.error(f"Error checking stale applications: {e}")
-                await asyncio.sleep(3600)
+                # Same in-app notification for every HR user, inserted in one statement
+                # The notification lists the 5 longest-waiting application ids
+                preview_ids = [
+                    app_id for (app_id,) in db.query(models.Application.id).filter(*stale_filter).order_by(
+                        models.Application.applied_date
+                    ).limit(5)
+                ]
+                message = f"{stale_count} applications have been pending review for 3+ days"
+                notification_data = {
+                    "stale_count": stale_count,
+                    "applications": preview_ids
+                }
+                notification_service.create_notifications_bulk([
+                    {
+                        "user_id": hr_user_id,
+                        "title": "Stale Applications Alert",
+                        "message": message,
+                        "type": "warning",
+                        "action_url": "/recruitment",
+                        "notification_data": notification_data
+                    }
+                    for hr_user_id in hr_user_ids
+                ])
+            
+            return stale_count
+        finally:
+            db.close()
 
 # Global instance
 background_task_manager = BackgroundTaskManager()
@@ -21,10 +21,13 @@ SQLALCHEMY_DATABASE_URL = os.getenv(
 # Create engine with connection pooling and timeouts
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using
-    pool_size=5,  # Number of connections to maintain
-    max_overflow=10,  # Max connections beyond pool_size
+    # Verify connections before using; set DB_POOL_PRE_PING=false to skip the extra
+    # round trip per checkout when the database doesn't drop idle connections
+    pool_pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    pool_size=int(os.getenv("DB_POOL_SIZE", "20")),  # Number of connections to maintain
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),  # Max connections beyond pool_size
     pool_recycle=3600,  # Recycle connections after 1 hour
+    query_cache_size=1200,  # Compiled statements kept per engine (default 500)
     connect_args={
         "connect_timeout": 10,  # 10 second connection timeout
         "options": "-c statement_timeout=30000"  # 30 second query timeout
@@ -14,16 +14,24 @@ import numpy as np
 import base64
 from io import BytesIO
 from PIL import Image
+from functools import lru_cache
 import os
 
-def decode_base64_image(base64_string):
-    """Decode base64 image string to PIL Image"""
+PROFILE_IMAGE_DIR = "uploads/profile_images"
+
+def decode_base64_payload(base64_string):
+    """Decode a base64 string, with or without a data URL prefix, to raw bytes"""
+    # Remove data URL prefix if present; base64 itself never contains a comma
+    comma = base64_string.find(',', 0, 64)
+    return base64.b64decode(base64_string[comma + 1:])
+
+def decode_base64_image(image):
+    """Decode a base64 image string (or already-decoded image bytes) to an image array"""
     try:
-        # Remove data URL prefix if present
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-        
-        image_data = base64.b64decode(base64_string)
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            image_data = image
+        else:
+            image_data = decode_base64_payload(image)
         image = Image.open(BytesIO(image_data))
         return np.array(image)
     except Exception as e:
@@ -61,8 +69,8 @@ def compare_faces(profile_image_base64, attendance_image_base64, tolerance=0.6):
     Compare two face images and return match result
     
     Args:
-        profile_image_base64: Base64 encoded profile image
-        attendance_image_base64: Base64 encoded attendance image
+        profile_image_base64: Base64 encoded profile image (or raw image bytes)
+        attendance_image_base64: Base64 encoded attendance image (or raw image bytes)
         tolerance: Face matching tolerance (lower = stricter, default 0.6)
     
     Returns:
@@ -111,19 +119,58 @@ def compare_faces(profile_image_base64, attendance_image_base64, tolerance=0.6):
                 "message": f"Attendance image error: {attendance_error}"
             }
         
-        # Compare faces
-        face_distance = face_recognition.face_distance([profile_encoding], attendance_encoding)[0]
-        match = face_distance <= tolerance
-        
-        # Calculate confidence percentage (inverse of distance)
-        confidence = max(0, min(100, (1 - face_distance) * 100))
+        return _match_encodings(profile_encoding, attendance_encoding, tolerance)
         
+    except Exception as e:
         return {
-            "match": match,
-            "confidence": round(confidence, 2),
-            "message": "Face matched successfully" if match else "Face does not match profile",
-            "face_distance": round(face_distance, 4)
+            "match": False,
+            "confidence": 0,
+            "message": f"Face recognition error: {str(e)}"
         }
+
+def compare_face_to_profile(employee_id, attendance_image, tolerance=0.6):
+    """
+    Compare an attendance image against the employee's stored profile image
+    
+    Same result as compare_faces, but the profile face encoding comes from
+    get_profile_encoding so it is only computed once per profile image.
+    Adds "profile_missing": True when the employee has no profile image.
+    """
+    try:
+        profile_encoding, profile_error = get_profile_encoding(employee_id)
+        if profile_encoding is None and profile_error is None:
+            return {
+                "match": False,
+                "confidence": 0,
+                "message": "Profile image not found",
+                "profile_missing": True
+            }
+        if not FACE_RECOGNITION_AVAILABLE:
+            return compare_faces(None, attendance_image, tolerance)
+        if profile_error:
+            return {
+                "match": False,
+                "confidence": 0,
+                "message": f"Profile image error: {profile_error}"
+            }
+        
+        attendance_array = decode_base64_image(attendance_image)
+        if attendance_array is None:
+            return {
+                "match": False,
+                "confidence": 0,
+                "message": "Failed to decode attendance image"
+            }
+        
+        attendance_encoding, attendance_error = get_face_encoding(attendance_array)
+        if attendance_error:
+            return {
+                "match": False,
+                "confidence": 0,
+                "message": f"Attendance image error: {attendance_error}"
+            }
+        
+        return _match_encodings(profile_encoding, attendance_encoding, tolerance)
         
     except Exception as e:
         return {
@@ -132,18 +179,64 @@ def compare_faces(profile_image_base64, attendance_image_base64, tolerance=0.6):
             "message": f"Face recognition error: {str(e)}"
         }
 
+def _match_encodings(profile_encoding, attendance_encoding, tolerance):
+    """Build the match result for two face encodings"""
+    # Euclidean distance, as face_recognition.face_distance computes it, without
+    # stacking a one-row matrix for a single 1:1 comparison
+    face_distance = np.linalg.norm(profile_encoding - attendance_encoding)
+    match = face_distance <= tolerance
+    
+    # Calculate confidence percentage (inverse of distance)
+    confidence = max(0, min(100, (1 - face_distance) * 100))
+    
+    return {
+        "match": match,
+        "confidence": round(confidence, 2),
+        "message": "Face matched successfully" if match else "Face does not match profile",
+        "face_distance": round(face_distance, 4)
+    }
+
+def get_profile_encoding(employee_id):
+    """
+    Get the face encoding of the employee's profile image as (encoding, error)
+    
+    Returns (None, None) when there is no profile image. Encodings are cached
+    per file version (mtime and size), so re-uploading a profile image is
+    picked up without explicit invalidation.
+    """
+    try:
+        stat = os.stat(_profile_image_path(employee_id))
+    except FileNotFoundError:
+        return None, None
+    return _profile_encoding(employee_id, stat.st_mtime_ns, stat.st_size)
+
+@lru_cache(maxsize=4096)
+def _profile_encoding(employee_id, mtime_ns, size):
+    """Decode the profile image and extract its face encoding (cached by file version)"""
+    try:
+        with open(_profile_image_path(employee_id), 'rb') as f:
+            image_array = decode_base64_image(f.read())
+    except OSError as e:
+        return None, f"Could not read profile image: {e}"
+    
+    if image_array is None:
+        return None, "Failed to decode profile image"
+    return get_face_encoding(image_array)
+
+def _profile_image_path(employee_id):
+    return os.path.join(PROFILE_IMAGE_DIR, f"employee_{employee_id}.jpg")
+
 def save_profile_image(employee_id, image_base64):
     """Save employee profile image for future face matching"""
     try:
-        upload_dir = "uploads/profile_images"
-        os.makedirs(upload_dir, exist_ok=True)
+        os.makedirs(PROFILE_IMAGE_DIR, exist_ok=True)
         
         # Decode and save image
         if ',' in image_base64:
             image_base64 = image_base64.split(',')[1]
         
         image_data = base64.b64decode(image_base64)
-        file_path = os.path.join(upload_dir, f"employee_{employee_id}.jpg")
+        file_path = _profile_image_path(employee_id)
         
         with open(file_path, 'wb') as f:
             f.write(image_data)
@@ -156,7 +249,7 @@ def save_profile_image(employee_id, image_base64):
 def load_profile_image(employee_id):
     """Load employee profile image as base64"""
     try:
-        file_path = f"uploads/profile_images/employee_{employee_id}.jpg"
+        file_path = _profile_image_path(employee_id)
         
         if not os.path.exists(file_path):
             return None
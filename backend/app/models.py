@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Date, Float, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Date, Float, Text, JSON, Index, cast, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from .database import Base
 from datetime import datetime
@@ -471,6 +473,8 @@ class Attendance(Base):
     verification_method = Column(String, default="photo") # photo, manual, face_recognition
     is_fraud_suspected = Column(Boolean, default=False)
     flagged_reason = Column(String, nullable=True)
+    # Structured fraud flags, e.g. [{"type": "rapid_attempts", "severity": "high", "details": "..."}]
+    fraud_indicators = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     face_match_confidence = Column(Float, nullable=True)  # Face recognition confidence %
     
     # Work Mode
@@ -488,6 +492,13 @@ class Attendance(Base):
     shift = relationship("Shift")
     wfh_request = relationship("WFHRequest", foreign_keys=[wfh_request_id])
     approver = relationship("User", foreign_keys=[approved_by])
+    
+    __table_args__ = (
+        # "Already marked today" check: one employee, one calendar day
+        Index("ix_attendance_emp_date", employee_id, func.date(date)),
+        # HR fraud reports: containment filters such as fraud_indicators @> '[{"type": "..."}]'
+        Index("ix_attendance_fraud_indicators", fraud_indicators, postgresql_using="gin"),
+    )
 
 class LeaveBalance(Base):
     __tablename__ = "leave_balances"
@@ -591,7 +602,9 @@ class AssetRequest(Base):
     status = Column(String, default="pending")  # pending, approved, assigned, completed, rejected
     
     # Request details
-    requested_assets = Column(JSON, default=[])  # List of asset types needed
+    # List of asset types needed, as submitted. Write-only mirror kept for rollback and the
+    # asset_request_items backfill; the items table is authoritative and is what the API reads.
+    requested_assets = Column(JSON, default=[])
     reason = Column(Text, nullable=True)
     business_justification = Column(Text, nullable=True)
     
@@ -618,6 +631,29 @@ class AssetRequest(Base):
     manager_approver = relationship("User", foreign_keys=[approved_by_manager])
     hr_approver = relationship("User", foreign_keys=[approved_by_hr])
     assets_team_member = relationship("User", foreign_keys=[assigned_to_assets_team])
+    items = relationship("AssetRequestItem", back_populates="request", order_by="AssetRequestItem.position", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Status-driven work queues, optionally narrowed to one employee
+        Index("ix_asset_request_status_emp", status, employee_id),
+    )
+
+class AssetRequestItem(Base):
+    """One requested asset per row, in submission order; normalized form of AssetRequest.requested_assets"""
+    __tablename__ = "asset_request_items"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    request_id = Column(Integer, ForeignKey("asset_requests.id", ondelete="CASCADE"), nullable=False, index=True)
+    asset_type_code = Column(String, nullable=False)  # Laptop, Monitor, Keyboard, ...
+    quantity = Column(Integer, default=1, nullable=False)
+    position = Column(Integer, default=0, nullable=False)  # Index in the submitted list
+    
+    request = relationship("AssetRequest", back_populates="items")
+    
+    __table_args__ = (
+        # "Which requests ask for X" lookups
+        Index("ix_asset_request_item_type_request", asset_type_code, request_id),
+    )
 
 class AssetComplaint(Base):
     __tablename__ = "asset_complaints"
@@ -650,6 +686,24 @@ class AssetComplaint(Base):
     employee = relationship("Employee")
     asset = relationship("Asset")
     assigned_technician = relationship("User", foreign_keys=[assigned_to])
+    
+    __table_args__ = (
+        # Open/in-progress complaint queue, newest first
+        Index("ix_asset_complaint_status_created", status, created_at.desc()),
+    )
+    
+    @staticmethod
+    def format_ticket_number(complaint_id: int) -> str:
+        """Ticket number shown to users, e.g. COMP-000042"""
+        return f"COMP-{complaint_id:06d}"
+    
+    @hybrid_property
+    def ticket_number(self):
+        return self.format_ticket_number(self.id)
+    
+    @ticket_number.expression
+    def ticket_number(cls):
+        return func.concat("COMP-", func.lpad(cast(cls.id, String), 6, "0"))
 
 class AssetAssignment(Base):
     __tablename__ = "asset_assignments"
@@ -823,6 +877,17 @@ class AssetAcknowledgment(Base):
     employee = relationship("Employee")
     infrastructure_request = relationship("InfrastructureRequest")
     reviewer = relationship("User", foreign_keys=[reviewed_by])
+    
+    __table_args__ = (
+        # Pending review queue and per-employee history, both newest first
+        Index("ix_ack_review_status_created", review_status, created_at.desc()),
+        Index("ix_ack_employee_id_created", employee_id, created_at.desc()),
+        # Partial index for the pending queue on PostgreSQL; other engines use the composite above
+        Index(
+            "ix_ack_pending_created", created_at.desc(),
+            postgresql_where=(review_status == "pending")
+        ),
+    )
 
 class AccessRequest(Base):
     __tablename__ = "access_requests"
@@ -1020,6 +1085,11 @@ class AuditLog(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User")
+    
+    __table_args__ = (
+        # Covers the admin audit log listing: created_at range + action/user filters, newest first
+        Index("ix_audit_logs_created_action_user", created_at.desc(), action, user_id),
+    )
 
 class NotificationPreference(Base):
     __tablename__ = "notification_preferences"
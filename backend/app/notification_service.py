@@ -2,9 +2,11 @@
 Multi-Channel Notification Service
 Supports: Email, SMS, WhatsApp
 """
+import asyncio
 import os
 from typing import Optional, List
 from datetime import datetime
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app import models
 import smtplib
@@ -54,17 +56,7 @@ class NotificationService:
         """Send email notification"""
         
         try:
-            msg = MIMEMultipart('alternative')
-            msg['From'] = FROM_EMAIL
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            # Add plain text
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Add HTML if provided
-            if html_body:
-                msg.attach(MIMEText(html_body, 'html'))
+            msg = self._build_email_message(to_email, subject, body, html_body)
             
             # Send email
             with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
@@ -96,6 +88,28 @@ class NotificationService:
             )
             return False
     
+    def _build_email_message(
+        self,
+        to_email: str,
+        subject: str,
+        body: str,
+        html_body: Optional[str] = None
+    ) -> MIMEMultipart:
+        """Build a plain text (+ optional HTML) email message"""
+        msg = MIMEMultipart('alternative')
+        msg['From'] = FROM_EMAIL
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        
+        # Add plain text
+        msg.attach(MIMEText(body, 'plain'))
+        
+        # Add HTML if provided
+        if html_body:
+            msg.attach(MIMEText(html_body, 'html'))
+        
+        return msg
+    
     # ========================================
     # SMS NOTIFICATIONS (Twilio)
     # ========================================
@@ -253,6 +267,76 @@ class NotificationService:
             "channels": results
         }
     
+    async def send_bulk_notification(
+        self,
+        user_ids: List[int],
+        subject: str,
+        message: str,
+        channels: List[str] = ["email"],  # email, sms, whatsapp
+        html_message: Optional[str] = None
+    ) -> dict:
+        """Send the same notification to many users
+        
+        Users and preferences are loaded in one query and all emails go out
+        over a single SMTP session, in a worker thread so the event loop keeps
+        running. html_message, if given, is attached as the email's HTML part.
+        Returns per-user channel results keyed by user id, like
+        send_notification's "channels".
+        """
+        rows = self.db.query(models.User.id, models.User.email, models.NotificationPreference).outerjoin(
+            models.NotificationPreference, models.NotificationPreference.user_id == models.User.id
+        ).filter(models.User.id.in_(user_ids)).all()
+        
+        recipients = {user_id: (email, prefs) for user_id, email, prefs in rows}
+        
+        results = {user_id: {} for user_id in recipients}
+        
+        # Email: one connection, one message per recipient
+        if "email" in channels:
+            email_targets = [
+                (user_id, email) for user_id, (email, prefs) in recipients.items()
+                if not prefs or prefs.email_enabled
+            ]
+            if email_targets:
+                sent_user_ids, errors = await asyncio.to_thread(_send_smtp_batch, [
+                    (user_id, self._build_email_message(email, subject, message, html_message))
+                    for user_id, email in email_targets
+                ])
+                for user_id in sent_user_ids:
+                    results[user_id]["email"] = True
+                
+                logs = []
+                for user_id, email in email_targets:
+                    sent = results[user_id].setdefault("email", False)
+                    logs.append(models.NotificationLog(
+                        user_id=user_id,
+                        type="email",
+                        subject=subject,
+                        message=message,
+                        status="sent" if sent else "failed",
+                        error_message=errors.get(user_id)
+                    ))
+                self.db.add_all(logs)
+                self.db.commit()
+        
+        # SMS / WhatsApp have no batch API; send per user
+        for user_id, (email, prefs) in recipients.items():
+            if "sms" in channels and prefs and prefs.sms_enabled and prefs.phone_number:
+                results[user_id]["sms"] = await self.send_sms(
+                    to_phone=prefs.phone_number,
+                    message=f"{subject}\n\n{message}"
+                )
+            if "whatsapp" in channels and prefs and prefs.whatsapp_enabled and prefs.whatsapp_number:
+                results[user_id]["whatsapp"] = await self.send_whatsapp(
+                    to_whatsapp=prefs.whatsapp_number,
+                    message=f"*{subject}*\n\n{message}"
+                )
+        
+        return {
+            "success": any(any(r.values()) for r in results.values()),
+            "results": results
+        }
+    
     # ========================================
     # RECRUITMENT-SPECIFIC NOTIFICATIONS
     # ========================================
@@ -419,6 +503,23 @@ https://yourapp.com/recruitment
         
         return notification
     
+    def create_notifications_bulk(self, rows: List[dict]) -> int:
+        """Create many in-app notifications with a single INSERT
+        
+        Each row takes the create_in_app_notification fields (user_id, title,
+        message, type, action_url, notification_data).
+        """
+        if not rows:
+            return 0
+        
+        self.db.execute(
+            insert(models.InAppNotification),
+            [{"is_read": False, **row} for row in rows]
+        )
+        self.db.commit()
+        
+        return len(rows)
+    
     async def notify_application_status_change(
         self,
         application_id: int,
@@ -1236,6 +1337,43 @@ Review Link: https://yourapp.com/dashboard/attendance
         self.db.add(log)
         self.db.commit()
 
+# Failures that only affect the message being sent; anything else (auth,
+# disconnects, socket errors) ends the session for the rest of the batch
+_SMTP_MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+    ValueError,
+)
+
+def _send_smtp_batch(messages: List[tuple]) -> tuple:
+    """Send (key, message) pairs over one SMTP session
+    
+    Returns the keys that were sent and a {key: error} dict for the rest.
+    A rejected message is recorded and skipped; a connection or login failure
+    is recorded against every key not yet sent.
+    """
+    sent = []
+    errors = {}
+    try:
+        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
+            server.starttls()
+            if SMTP_USERNAME and SMTP_PASSWORD:
+                server.login(SMTP_USERNAME, SMTP_PASSWORD)
+            for key, msg in messages:
+                try:
+                    server.send_message(msg)
+                except _SMTP_MESSAGE_ERRORS as e:
+                    errors[key] = str(e)
+                else:
+                    sent.append(key)
+    except Exception as e:
+        done = set(sent) | errors.keys()
+        for key, _ in messages:
+            if key not in done:
+                errors[key] = str(e)
+    return sent, errors
+
 # ============================================
 # SINGLETON INSTANCE
 # ============================================
@@ -1,6 +1,10 @@
 from functools import wraps
 from fastapi import HTTPException, status, Depends
-from typing import List
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from . import models
+import time
 
 def require_roles(allowed_roles: List[str]):
     """
@@ -269,4 +273,36 @@ def validate_attendance_access(user_role: str):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid user role for attendance system access"
-        )
\ No newline at end of file
+        )
+
+# ==================== ROLE RECIPIENT LOOKUP ====================
+
+# Active user ids per role set, shared across requests: roles -> (loaded_at, ids)
+_ROLE_USER_IDS_TTL = 60  # seconds
+_role_user_ids_cache: Dict[frozenset, Tuple[float, List[int]]] = {}
+
+def get_active_user_ids_by_roles(db: Session, roles: Iterable[str]) -> List[int]:
+    """
+    Get ids of active users holding any of the given roles (e.g. notification recipients).
+    Results are cached for a short TTL and dropped whenever a User row changes.
+    """
+    key = frozenset(roles)
+    cached = _role_user_ids_cache.get(key)
+    if cached and time.monotonic() - cached[0] < _ROLE_USER_IDS_TTL:
+        return cached[1]
+    
+    user_ids = [
+        user_id for (user_id,) in db.query(models.User.id).filter(
+            models.User.role.in_(key),
+            models.User.is_active == True
+        )
+    ]
+    _role_user_ids_cache[key] = (time.monotonic(), user_ids)
+    return user_ids
+
+def invalidate_role_user_ids_cache(*args):
+    """Drop cached role recipients; wired to User insert/update/delete events"""
+    _role_user_ids_cache.clear()
+
+for _user_event in ("after_insert", "after_update", "after_delete"):
+    event.listen(models.User, _user_event, invalidate_role_user_ids_cache)
@@ -2,63 +2,30 @@
 Asset Acknowledgment API Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Dict, Any, List
 from pydantic import BaseModel
 from datetime import datetime
 
 from ..database import get_db
 from ..dependencies import get_current_user
 from ..models import User, Employee
-from ..asset_acknowledgment_service import AssetAcknowledgmentService
+from ..schemas import AcknowledgmentInput, AcknowledgmentOut
+from ..asset_acknowledgment_service import (
+    AssetAcknowledgmentService,
+    send_ack_admin_notification,
+    send_ack_review_notification
+)
 from ..role_utils import require_role
 
 router = APIRouter(prefix="/acknowledgments", tags=["acknowledgments"])
 
-class AcknowledgmentCreate(BaseModel):
+class AcknowledgmentCreate(AcknowledgmentInput):
     employee_name: str
     employee_id_number: str
     department: str
     date_of_joining: datetime
-    
-    # Received Items
-    laptop_received: bool = False
-    laptop_serial_number: str = None
-    laptop_model: str = None
-    laptop_condition: str = None
-    
-    email_received: bool = False
-    email_address: str = None
-    email_password_received: bool = False
-    
-    wifi_access_received: bool = False
-    wifi_credentials_received: bool = False
-    
-    id_card_received: bool = False
-    id_card_number: str = None
-    
-    biometric_setup_completed: bool = False
-    biometric_type: str = None
-    
-    # Additional Items
-    monitor_received: bool = False
-    monitor_serial_number: str = None
-    keyboard_received: bool = False
-    mouse_received: bool = False
-    headset_received: bool = False
-    mobile_received: bool = False
-    mobile_number: str = None
-    
-    # Login Status
-    system_login_working: bool = False
-    email_login_working: bool = False
-    vpn_access_working: bool = False
-    
-    # Comments
-    employee_comments: str = None
-    issues_reported: str = None
-    additional_requirements: str = None
 
 class AcknowledgmentReview(BaseModel):
     review_status: str  # approved, needs_action
@@ -67,6 +34,7 @@ class AcknowledgmentReview(BaseModel):
 @router.post("/submit")
 async def submit_acknowledgment(
     acknowledgment_data: AcknowledgmentCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -81,12 +49,16 @@ async def submit_acknowledgment(
     
     result = service.create_acknowledgment(
         employee_id=employee.id,
-        acknowledgment_data=acknowledgment_data.dict()
+        acknowledgment_data=acknowledgment_data,
+        notify=False
     )
     
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
     
+    # Email admins after the response is sent
+    background_tasks.add_task(send_ack_admin_notification, result["acknowledgment_id"])
+    
     return result
 
 @router.get("/check-pending")
@@ -103,7 +75,7 @@ async def check_pending_acknowledgment(
     service = AssetAcknowledgmentService(db)
     return service.check_pending_acknowledgment(employee.id)
 
-@router.get("/my-acknowledgments")
+@router.get("/my-acknowledgments", response_model=List[AcknowledgmentOut])
 async def get_my_acknowledgments(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -117,7 +89,7 @@ async def get_my_acknowledgments(
     service = AssetAcknowledgmentService(db)
     return service.get_employee_acknowledgments(employee.id)
 
-@router.get("/pending")
+@router.get("/pending", response_model=List[AcknowledgmentOut])
 async def get_pending_acknowledgments(
     current_user: User = Depends(require_role(["admin", "hr"])),
     db: Session = Depends(get_db)
@@ -145,6 +117,7 @@ async def get_acknowledgment_details(
 async def review_acknowledgment(
     acknowledgment_id: int,
     review_data: AcknowledgmentReview,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(require_role(["admin", "hr"])),
     db: Session = Depends(get_db)
 ):
@@ -155,10 +128,14 @@ async def review_acknowledgment(
         acknowledgment_id=acknowledgment_id,
         reviewer_id=current_user.id,
         review_status=review_data.review_status,
-        admin_comments=review_data.admin_comments
+        admin_comments=review_data.admin_comments,
+        notify=False
     )
     
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
     
+    # Email the employee after the response is sent
+    background_tasks.add_task(send_ack_review_notification, acknowledgment_id)
+    
     return result
\ No newline at end of file
@@ -17,6 +17,9 @@ router = APIRouter(
 # Request/Response Models
 class CapabilitiesUpdate(BaseModel):
     capabilities: Dict[str, Any]
+    # Pre-edit snapshot the client rendered from; a mismatch with the stored
+    # capabilities rejects the save as stale
+    previous_capabilities: Optional[Dict[str, Any]] = None
 
 class RoleUpdate(BaseModel):
     new_role: str
@@ -81,8 +84,14 @@ async def save_capabilities(
         details=f"Capability change attempted by {current_user.email}"
     )
     
-    result = admin_service.save_system_capabilities(capabilities_update.capabilities, current_user.id)
+    result = admin_service.save_system_capabilities(
+        capabilities_update.capabilities,
+        current_user.id,
+        expected_capabilities=capabilities_update.previous_capabilities
+    )
     
+    if result.get("conflict"):
+        raise HTTPException(status_code=409, detail=result["message"])
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
     
@@ -406,21 +415,21 @@ async def create_sample_audit_logs(
         }
     ]
     
-    created_count = 0
-    for log_data in sample_logs:
-        success = admin_service.create_audit_log(
-            user_id=current_user.id,
-            action=log_data["action"],
-            resource_type=log_data["resource_type"],
-            resource_id=log_data["resource_id"],
-            old_value=log_data.get("old_value"),
-            new_value=log_data.get("new_value"),
-            ip_address="127.0.0.1",
-            user_agent="Sample-Agent/1.0",
-            details=log_data["details"]
-        )
-        if success:
-            created_count += 1
+    entries = [
+        {
+            "user_id": current_user.id,
+            "action": log_data["action"],
+            "resource_type": log_data["resource_type"],
+            "resource_id": log_data["resource_id"],
+            "old_value": log_data.get("old_value"),
+            "new_value": log_data.get("new_value"),
+            "ip_address": "127.0.0.1",
+            "user_agent": "Sample-Agent/1.0",
+            "details": log_data["details"]
+        }
+        for log_data in sample_logs
+    ]
+    created_count = len(entries) if admin_service.create_audit_logs_bulk(entries) else 0
     
     return {
         "success": True,
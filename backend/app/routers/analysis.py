@@ -24,22 +24,13 @@ def get_insights(db: Session = Depends(database.get_db)):
     reviews = db.query(models.PerformanceReview).all()
     feedbacks = db.query(models.Feedback).all()
     
-    total_sentiment = 0
-    count = 0
+    # Analyze reviews and feedbacks; repeated texts hit the sentiment cache
+    texts = [review.comments for review in reviews if review.comments]
+    texts += [feedback.content for feedback in feedbacks if feedback.content]
+    sentiments = [ai_utils.analyze_sentiment(text) for text in texts]
     
-    # Analyze reviews
-    for review in reviews:
-        if review.comments:
-            sentiment = ai_utils.analyze_sentiment(review.comments)
-            total_sentiment += sentiment["score"]
-            count += 1
-            
-    # Analyze feedbacks
-    for feedback in feedbacks:
-        if feedback.content:
-            sentiment = ai_utils.analyze_sentiment(feedback.content)
-            total_sentiment += sentiment["score"]
-            count += 1
+    total_sentiment = sum(sentiment["score"] for sentiment in sentiments)
+    count = len(sentiments)
             
     avg_sentiment_score = total_sentiment / count if count > 0 else 0
     
@@ -52,31 +43,29 @@ def get_insights(db: Session = Depends(database.get_db)):
 
     # 3. Attrition Risk (AI Prediction)
     employees = db.query(models.Employee).all()
-    high_risk_count = 0
     total_employees = len(employees)
     
+    tenure_years = []
+    last_ratings = []
     for emp in employees:
         # Gather data for prediction
         # Get latest review
         latest_review = db.query(models.PerformanceReview).filter(models.PerformanceReview.employee_id == emp.id).order_by(models.PerformanceReview.review_date.desc()).first()
-        last_rating = latest_review.rating if latest_review else 3.0 # Default neutral
+        last_ratings.append(latest_review.rating if latest_review else 3.0) # Default neutral
         
         # Calculate tenure
         tenure_days = (datetime.utcnow() - emp.date_of_joining).days if emp.date_of_joining else 0
-        tenure_years = tenure_days / 365.0
-        
-        # Mocking some missing data points for the heuristic
-        emp_data = {
-            "tenure_years": tenure_years,
-            "last_rating": last_rating,
-            "salary_hike_percent": 0, # Placeholder
-            "engagement_score": 7, # Placeholder
-            "overtime_hours": 5 # Placeholder
-        }
-        
-        risk = ai_utils.predict_attrition_risk(emp_data)
-        if risk == "High":
-            high_risk_count += 1
+        tenure_years.append(tenure_days / 365.0)
+    
+    # Mocking some missing data points for the heuristic
+    risks = ai_utils.predict_attrition_risk_batch({
+        "tenure_years": tenure_years,
+        "last_rating": last_ratings,
+        "salary_hike_percent": [0] * total_employees, # Placeholder
+        "engagement_score": [7] * total_employees, # Placeholder
+        "overtime_hours": [5] * total_employees # Placeholder
+    })
+    high_risk_count = int((risks == "High").sum())
             
     attrition_risk_label = "Low"
     if total_employees > 0:
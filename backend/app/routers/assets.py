@@ -2,7 +2,7 @@
 Asset Management API Routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
@@ -11,7 +11,11 @@ from datetime import datetime
 from ..database import get_db
 from ..dependencies import get_current_user
 from ..models import User
-from ..asset_management_service import AssetManagementService
+from ..asset_management_service import (
+    AssetManagementService,
+    send_complaint_created_notifications,
+    send_complaint_resolved_notifications
+)
 from ..role_utils import require_role
 
 router = APIRouter(prefix="/assets", tags=["assets"])
@@ -86,6 +90,8 @@ async def get_pending_manager_requests(
 
 @router.get("/requests/pending-hr")
 async def get_pending_hr_requests(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -94,7 +100,10 @@ async def get_pending_hr_requests(
         raise HTTPException(status_code=403, detail="Access denied")
     
     service = AssetManagementService(db)
-    return service.get_pending_requests_for_hr()
+    try:
+        return service.get_pending_requests_for_hr(limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/requests/assets-team")
 async def get_assets_team_requests(
@@ -206,6 +215,7 @@ async def fulfill_asset_request(
 @router.post("/complaints")
 async def create_complaint(
     complaint_data: ComplaintCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -242,16 +252,22 @@ async def create_complaint(
         complaint_type=complaint_data.complaint_type,
         asset_id=complaint_data.asset_id,
         priority=complaint_data.priority,
-        impact_level=complaint_data.impact_level
+        impact_level=complaint_data.impact_level,
+        notify=False
     )
     
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
     
+    # Notify the assets team after the response is sent
+    background_tasks.add_task(send_complaint_created_notifications, result["complaint_id"])
+    
     return result
 
 @router.get("/complaints/assets-team")
 async def get_complaints_for_assets_team(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -264,7 +280,10 @@ async def get_complaints_for_assets_team(
         )
     
     service = AssetManagementService(db)
-    return service.get_complaints_for_assets_team()
+    try:
+        return service.get_complaints_for_assets_team(limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.post("/complaints/{complaint_id}/assign")
 async def assign_complaint(
@@ -292,6 +311,7 @@ async def assign_complaint(
 async def resolve_complaint(
     complaint_id: int,
     resolution_data: ComplaintResolution,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -305,12 +325,16 @@ async def resolve_complaint(
         complaint_id=complaint_id,
         resolution_notes=resolution_data.resolution_notes,
         resolution_action=resolution_data.resolution_action,
-        technician_id=current_user.id
+        technician_id=current_user.id,
+        notify=False
     )
     
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
     
+    # Notify the employee and managers after the response is sent
+    background_tasks.add_task(send_complaint_resolved_notifications, complaint_id)
+    
     return result
 
 @router.get("/my-assets")
@@ -330,6 +354,8 @@ async def get_my_assets(
 
 @router.get("/my-requests")
 async def get_my_requests(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -341,10 +367,15 @@ async def get_my_requests(
         raise HTTPException(status_code=404, detail="Employee profile not found")
     
     service = AssetManagementService(db)
-    return service.get_employee_requests(employee.id)
+    try:
+        return service.get_employee_requests(employee.id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/my-complaints")
 async def get_my_complaints(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -356,7 +387,10 @@ async def get_my_complaints(
         raise HTTPException(status_code=404, detail="Employee profile not found")
     
     service = AssetManagementService(db)
-    return service.get_employee_complaints(employee.id)
+    try:
+        return service.get_employee_complaints(employee.id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/available")
 async def get_available_assets(
@@ -651,9 +651,9 @@ async def upload_profile_image(
         if not file_path:
             raise HTTPException(status_code=500, detail="Failed to save profile image")
         
-        # Verify face is detectable
-        image_array = face_recognition_utils.decode_base64_image(data.image)
-        encoding, error = face_recognition_utils.get_face_encoding(image_array)
+        # Verify face is detectable; this also caches the profile encoding
+        # used when marking attendance
+        encoding, error = face_recognition_utils.get_profile_encoding(employee.id)
         
         if error:
             raise HTTPException(status_code=400, detail=error)
@@ -694,22 +694,19 @@ async def mark_attendance_with_face_recognition(
         if not employee:
             raise HTTPException(status_code=404, detail="Employee profile not found")
         
-        # Load profile image
-        profile_image = face_recognition_utils.load_profile_image(employee.id)
+        # Compare faces against the cached profile encoding
+        result = face_recognition_utils.compare_face_to_profile(
+            employee.id, 
+            data.attendance_image,
+            tolerance=0.6  # Adjust tolerance as needed
+        )
         
-        if not profile_image:
+        if result.get("profile_missing"):
             raise HTTPException(
                 status_code=404, 
                 detail="Profile image not found. Please upload your profile image first"
             )
         
-        # Compare faces
-        result = face_recognition_utils.compare_faces(
-            profile_image, 
-            data.attendance_image,
-            tolerance=0.6  # Adjust tolerance as needed
-        )
-        
         if not result["match"]:
             return {
                 "success": False,
@@ -1,6 +1,6 @@
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, computed_field
 
 # --- Auth Schemas ---
 
@@ -207,6 +207,7 @@ class AttendanceOut(BaseModel):
     verification_method: str
     is_fraud_suspected: bool
     flagged_reason: Optional[str]
+    fraud_indicators: Optional[List[Dict[str, Any]]] = None
     work_mode: str
     wfh_request_id: Optional[int]
     requires_approval: bool
@@ -937,4 +938,87 @@ class ShiftOut(BaseModel):
 
 class ShiftAssignmentCreate(BaseModel):
     employee_id: int
-    shift_id: int
\ No newline at end of file
+    shift_id: int
+
+
+# --- Asset Acknowledgment Schemas ---
+
+class AcknowledgmentInput(BaseModel):
+    # Employee Details (filled from the employee profile when omitted)
+    employee_name: Optional[str] = None
+    employee_id_number: Optional[str] = None
+    department: Optional[str] = None
+    date_of_joining: Optional[datetime] = None
+    
+    # Received Items
+    laptop_received: bool = False
+    laptop_serial_number: Optional[str] = None
+    laptop_model: Optional[str] = None
+    laptop_condition: Optional[str] = None
+    
+    email_received: bool = False
+    email_address: Optional[str] = None
+    email_password_received: bool = False
+    
+    wifi_access_received: bool = False
+    wifi_credentials_received: bool = False
+    
+    id_card_received: bool = False
+    id_card_number: Optional[str] = None
+    
+    biometric_setup_completed: bool = False
+    biometric_type: Optional[str] = None
+    
+    # Additional Items
+    monitor_received: bool = False
+    monitor_serial_number: Optional[str] = None
+    keyboard_received: bool = False
+    mouse_received: bool = False
+    headset_received: bool = False
+    mobile_received: bool = False
+    mobile_number: Optional[str] = None
+    
+    # Login Status
+    system_login_working: bool = False
+    email_login_working: bool = False
+    vpn_access_working: bool = False
+    
+    # Employee Acknowledgment
+    employee_signature: str = "Digital Confirmation"
+    employee_comments: Optional[str] = None
+    issues_reported: Optional[str] = None
+    additional_requirements: Optional[str] = None
+
+class AcknowledgmentReviewerOut(BaseModel):
+    email: str
+    model_config = ConfigDict(from_attributes=True)
+
+class AcknowledgmentOut(BaseModel):
+    id: int
+    employee_id: Optional[int] = None
+    employee_name: str
+    employee_id_number: str
+    department: str
+    status: Optional[str] = None
+    review_status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    reviewed_at: Optional[datetime] = None
+    # Only read to derive has_issues / reviewer_name, not part of the response
+    issues_reported: Optional[str] = Field(default=None, exclude=True)
+    reviewer: Optional[AcknowledgmentReviewerOut] = Field(default=None, exclude=True)
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def reference_number(self) -> str:
+        return f"ACK-{self.id:06d}"
+
+    @computed_field
+    @property
+    def has_issues(self) -> bool:
+        return bool(self.issues_reported)
+
+    @computed_field
+    @property
+    def reviewer_name(self) -> Optional[str]:
+        return self.reviewer.email if self.reviewer else None
@@ -0,0 +1,35 @@
+-- ============================================
+-- MIGRATION: Normalize asset_requests.requested_assets into asset_request_items
+-- Run this script on existing databases; new databases get the table
+-- from the SQLAlchemy models via create_all
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS asset_request_items (
+    id SERIAL PRIMARY KEY,
+    request_id INTEGER NOT NULL REFERENCES asset_requests(id) ON DELETE CASCADE,
+    asset_type_code VARCHAR NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 1,
+    position INTEGER NOT NULL DEFAULT 0
+);
+
+-- Databases that ran an earlier version of this script lack the position column
+ALTER TABLE asset_request_items ADD COLUMN IF NOT EXISTS position INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS ix_asset_request_items_id ON asset_request_items(id);
+CREATE INDEX IF NOT EXISTS ix_asset_request_items_request_id ON asset_request_items(request_id);
+CREATE INDEX IF NOT EXISTS ix_asset_request_item_type_request ON asset_request_items(asset_type_code, request_id);
+
+-- Backfill from the JSON list, one row per element in list order. requested_assets
+-- is still written for every request, so rebuilding from it is safe to re-run and
+-- replaces rows grouped by type by the earlier version of this script.
+BEGIN;
+
+DELETE FROM asset_request_items;
+
+INSERT INTO asset_request_items (request_id, asset_type_code, quantity, position)
+SELECT r.id, item.value, 1, item.ordinality - 1
+FROM asset_requests r
+CROSS JOIN LATERAL json_array_elements_text(COALESCE(r.requested_assets::json, '[]'::json))
+    WITH ORDINALITY AS item(value, ordinality);
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- ============================================
+-- MIGRATION: Structured fraud indicators on attendance
+-- Run this script on existing databases; new databases get the column
+-- from the SQLAlchemy models via create_all
+-- ============================================
+
+ALTER TABLE attendance ADD COLUMN IF NOT EXISTS fraud_indicators JSONB;
+
+-- HR fraud reports: containment filters such as fraud_indicators @> '[{"type": "rapid_attempts"}]'
+CREATE INDEX IF NOT EXISTS ix_attendance_fraud_indicators ON attendance USING GIN (fraud_indicators);
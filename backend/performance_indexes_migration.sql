@@ -0,0 +1,30 @@
+-- ============================================
+-- MIGRATION: Performance indexes
+-- Run this script on existing databases; new databases get these
+-- indexes from the SQLAlchemy models via create_all
+--
+-- Indexes are built CONCURRENTLY so writes to these tables are not blocked.
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block: run the
+-- file with plain psql (no -1/--single-transaction, no BEGIN). If a build
+-- fails it leaves an INVALID index that IF NOT EXISTS will skip; drop that
+-- index and re-run the script.
+-- ============================================
+
+-- Audit log listing: created_at range scan with action/user filters, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_audit_logs_created_action_user ON audit_logs(created_at DESC, action, user_id);
+
+-- Asset acknowledgments: pending review queue and per-employee history, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ack_review_status_created ON asset_acknowledgments(review_status, created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ack_employee_id_created ON asset_acknowledgments(employee_id, created_at DESC);
+
+-- Asset acknowledgments: partial index covering only the pending review queue
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ack_pending_created ON asset_acknowledgments(created_at DESC) WHERE review_status = 'pending';
+
+-- Asset requests: status work queues, optionally filtered by employee
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asset_request_status_emp ON asset_requests(status, employee_id);
+
+-- Asset complaints: open/in-progress queue, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asset_complaint_status_created ON asset_complaints(status, created_at DESC);
+
+-- Attendance: "already marked today" lookup by employee and calendar day
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_attendance_emp_date ON attendance(employee_id, date(date));
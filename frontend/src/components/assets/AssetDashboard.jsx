@@ -8,6 +8,8 @@ export default function AssetDashboard() {
   const [myAssets, setMyAssets] = useState([]);
   const [myRequests, setMyRequests] = useState([]);
   const [myComplaints, setMyComplaints] = useState([]);
+  const [requestsCursor, setRequestsCursor] = useState(null);
+  const [complaintsCursor, setComplaintsCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [showRequestForm, setShowRequestForm] = useState(false);
   const [showComplaintForm, setShowComplaintForm] = useState(false);
@@ -26,8 +28,10 @@ export default function AssetDashboard() {
       ]);
       
       setMyAssets(assetsRes.data);
-      setMyRequests(requestsRes.data);
-      setMyComplaints(complaintsRes.data);
+      setMyRequests(requestsRes.data.items);
+      setRequestsCursor(requestsRes.data.next_cursor);
+      setMyComplaints(complaintsRes.data.items);
+      setComplaintsCursor(complaintsRes.data.next_cursor);
     } catch (error) {
       console.error('Error fetching asset data:', error);
     } finally {
@@ -35,6 +39,26 @@ export default function AssetDashboard() {
     }
   };
 
+  const loadMoreRequests = async () => {
+    try {
+      const response = await api.get('/assets/my-requests', { params: { cursor: requestsCursor } });
+      setMyRequests((prev) => [...prev, ...response.data.items]);
+      setRequestsCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error loading more requests:', error);
+    }
+  };
+
+  const loadMoreComplaints = async () => {
+    try {
+      const response = await api.get('/assets/my-complaints', { params: { cursor: complaintsCursor } });
+      setMyComplaints((prev) => [...prev, ...response.data.items]);
+      setComplaintsCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error loading more complaints:', error);
+    }
+  };
+
   const handleRequestSubmit = () => {
     setShowRequestForm(false);
     fetchData();
@@ -244,6 +268,16 @@ export default function AssetDashboard() {
               <p className="text-gray-600">You haven't made any asset requests yet.</p>
             </div>
           )}
+          {requestsCursor && (
+            <div className="text-center">
+              <button
+                onClick={loadMoreRequests}
+                className="text-blue-600 hover:text-blue-800 font-medium"
+              >
+                Load more
+              </button>
+            </div>
+          )}
         </div>
       )}
 
@@ -289,6 +323,16 @@ export default function AssetDashboard() {
               <p className="text-gray-600">You haven't reported any issues yet.</p>
             </div>
           )}
+          {complaintsCursor && (
+            <div className="text-center">
+              <button
+                onClick={loadMoreComplaints}
+                className="text-blue-600 hover:text-blue-800 font-medium"
+              >
+                Load more
+              </button>
+            </div>
+          )}
         </div>
       )}
 
@@ -7,6 +7,7 @@ export default function AssetsTeamDashboard() {
   const [activeTab, setActiveTab] = useState('infrastructure');
   const [requests, setRequests] = useState([]);
   const [complaints, setComplaints] = useState([]);
+  const [complaintsCursor, setComplaintsCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [selectedRequest, setSelectedRequest] = useState(null);
   const [showFulfillmentModal, setShowFulfillmentModal] = useState(false);
@@ -24,7 +25,8 @@ export default function AssetsTeamDashboard() {
       ]);
       
       setRequests(requestsRes.data);
-      setComplaints(complaintsRes.data);
+      setComplaints(complaintsRes.data.items);
+      setComplaintsCursor(complaintsRes.data.next_cursor);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
@@ -32,6 +34,16 @@ export default function AssetsTeamDashboard() {
     }
   };
 
+  const loadMoreComplaints = async () => {
+    try {
+      const response = await api.get('/assets/complaints/assets-team', { params: { cursor: complaintsCursor } });
+      setComplaints((prev) => [...prev, ...response.data.items]);
+      setComplaintsCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error loading more complaints:', error);
+    }
+  };
+
   const handleAssignRequest = async (requestId) => {
     try {
       await api.post(`/assets/requests/${requestId}/assign-team`);
@@ -266,6 +278,16 @@ export default function AssetsTeamDashboard() {
               <p className="text-gray-600">No complaints to resolve at the moment.</p>
             </div>
           )}
+          {complaintsCursor && (
+            <div className="text-center">
+              <button
+                onClick={loadMoreComplaints}
+                className="text-blue-600 hover:text-blue-800 font-medium"
+              >
+                Load more
+              </button>
+            </div>
+          )}
         </div>
       )}
 